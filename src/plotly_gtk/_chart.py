@@ -1,30 +1,101 @@
 """Contains a private class to handle plotting for
-:class:`plotly_gtk.chart.PlotlyGTK`."""
+:class:`plotly_gtk.chart.PlotlyGTK` and :func:`plotly_gtk.export.render`, which
+draws onto any cairo context without using GTK."""
 
+import collections
+import concurrent.futures
+import functools
+import math
+import os
+
+import cairo
 import gi
 import numpy as np
 
 from plotly_gtk.utils import *  # pylint: disable=wildcard-import,unused-wildcard-import
-
-gi.require_version("Gtk", "4.0")
-from gi.repository import (  # pylint: disable=wrong-import-position,wrong-import-order
-    Gtk,
-    Pango,
-    PangoCairo,
+from plotly_gtk.utils.geometry import (
+    MARKER_SYMBOLS,
+    bar_outline,
+    decimate,
+    finite_segments,
+    group_markers,
+    in_bounds,
+    parse_symbol,
+    spline_controls,
+    step_vertices,
+    visible_slice,
 )
+from plotly_gtk.utils.text import show_layout, text_layout, update_context
+
+gi.require_foreign("cairo")
 
 DEBUG = False
 
+# The private layout keys which affect drawing. Others, such as "_tickvals", are
+# derived from these while drawing.
+_LAYOUT_STATE = ["_range", "_domain", "_position", "_shift", "_type"]
+# The memory which the surfaces of traces which are not shown, and then of those
+# least recently drawn, are evicted to stay within
+_TRACE_CACHE_BYTES = 256 * 2**20
+
+# The number of circle markers of the same size from which they are painted from an
+# image of one marker, rather than drawn as paths
+_STAMP_MIN_MARKERS = 16
+
+_executors: dict[int, concurrent.futures.ThreadPoolExecutor] = {}
 
-class _PlotlyGtk(Gtk.DrawingArea):
-    def __init__(self, fig: dict):
-        super().__init__()
-        self.data = fig["data"]
-        self.layout = fig["layout"]
 
-        self.set_draw_func(self._on_draw)
+def _get_executor(threads: int) -> concurrent.futures.ThreadPoolExecutor:
+    if threads not in _executors:
+        _executors[threads] = concurrent.futures.ThreadPoolExecutor(
+            threads, thread_name_prefix="plotly-gtk-render"
+        )
+    return _executors[threads]
+
+
+@functools.lru_cache(maxsize=64)
+def _circle_stamp(
+    radius: float,
+    is_open: bool,
+    is_dot: bool,
+    line_width: float,
+    scale: float,
+    rgba: tuple[float, float, float, float],
+) -> cairo.ImageSurface:  # pylint: disable=too-many-arguments
+    """Draw a circle marker in the centre of an image, to be painted at each point."""
+    dot_radius = max(radius / 4, line_width) if is_dot else 0
+    half = max(radius + line_width / 2, dot_radius) + 1
+    size = math.ceil(2 * half * scale)
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, size, size)
+    surface.set_device_scale(scale, scale)
+    context = cairo.Context(surface)
+    context.set_source_rgba(*rgba)
+    centre = size / scale / 2
+    context.arc(centre, centre, radius, 0, 2 * np.pi)
+    if is_open:
+        context.set_line_width(line_width)
+        context.stroke()
+    else:
+        context.fill()
+    if is_dot:
+        context.arc(centre, centre, dot_radius, 0, 2 * np.pi)
+        context.fill()
+    return surface
 
-    def update(self, fig: dict[str, plotly_types.Data, plotly_types.Layout]):
+
+class _Chart:
+    def __init__(self, fig: dict, render_threads: int | None = 1):
+        self.render_threads = render_threads
+        self.data = fig["data"]
+        self.layout = fig["layout"]
+        self._layout_signature = None
+        self._layout_version = 0
+        self._trace_signatures = []
+        self._layers = {}
+        self._trace_versions = {}
+        self._update_signatures()
+
+    def update(self, fig: "dict[str, plotly_types.Data | plotly_types.Layout]"):
         """Update the plot with a new figure.
 
         Parameters
@@ -34,17 +105,295 @@ class _PlotlyGtk(Gtk.DrawingArea):
         """
         self.data = fig["data"]
         self.layout = fig["layout"]
-        self.queue_draw()
+        self._update_signatures()
 
-    def _on_draw(self, area, context, x, y):  # pylint: disable=unused-argument
-        self.get_parent().automargin()
+    def _update_signatures(self):
+        signature = (
+            freeze(self.layout, _LAYOUT_STATE),
+            tuple(get_cartesian_subplots(self.data)),
+        )
+        if signature != self._layout_signature:
+            self._layout_signature = signature
+            self._layout_version += 1
+        self._trace_signatures = [
+            (
+                freeze(
+                    {
+                        key: value
+                        for key, value in plot.items()
+                        if key not in ["x", "y", "_visible"]
+                    },
+                    ["_data"],
+                ),
+                # The default mode depends on the number of points
+                "mode" in plot or "x" not in plot or len(plot["x"]) <= 20,
+                plot["_data"].version if "_data" in plot else None,
+            )
+            for plot in self.data
+        ]
+
+    def draw(self, context, width, height, scale=1, cache=True):
+        """Draw the plot.
+
+        Parameters
+        ----------
+        context: cairo.Context
+            The context to draw on
+        width: int
+            The width of the plot
+        height: int
+            The height of the plot
+        scale: float
+            The number of device pixels per unit of the context
+        cache: bool
+            Whether to draw through image surfaces which are kept between calls,
+            so that only the parts of the plot which have changed are drawn again.
+            This should be False when drawing onto vector surfaces.
+        """
+        if not cache:
+            self._draw_background(context, width, height)
+            for _, plot, index, _ in self._visible_traces():
+                self._plot_trace(context, width, height, plot, index)
+            self._draw_axes_and_ticks(context, width, height)
+            return
+
+        geometry = (width, height, scale, tuple(self.layout["_margin"].items()))
+
+        self._paint_layer(
+            context,
+            "background",
+            (geometry, self._layout_version),
+            self._draw_background,
+        )
+        # The data of a trace is compared by identity as well as version, as the
+        # versions of data which replaced it may be the same
+        traces = [
+            (
+                ("trace", position),
+                plot,
+                index,
+                (geometry, *signature[:-1], index, *self._axis_states(plot)),
+                (plot.get("_data"), signature[-1]),
+            )
+            for position, plot, index, signature in self._visible_traces()
+        ]
+        self._paint_layer(
+            context,
+            "traces",
+            (
+                geometry,
+                tuple((name, key, version) for name, _, _, key, version in traces),
+            ),
+            lambda layer_context, width, height: self._composite_traces(
+                layer_context, width, height, traces
+            ),
+        )
+        self._paint_layer(
+            context, "axes", (geometry, self._layout_version), self._draw_axes_and_ticks
+        )
+
+    def _paint_layer(self, context, name, key, draw):
+        if name not in self._layers or self._layers[name][0] != key:
+            self._layers[name] = (
+                key,
+                self._render_layer(key, draw, context.get_font_options()),
+            )
+        context.set_source_surface(self._layers[name][1], 0, 0)
+        context.paint()
+
+    @staticmethod
+    def _render_layer(key, draw, font_options, bounds=None):
+        """Draw into a new surface covering `bounds`, which is drawn in the right
+        place when it is used as a source at the origin.
+
+        This does not use GTK, so it can be called from a worker thread."""
+        width, height, scale, _ = key[0]
+        left, top, right, bottom = bounds or (0, 0, width, height)
+        surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32,
+            math.ceil((right - left) * scale),
+            math.ceil((bottom - top) * scale),
+        )
+        surface.set_device_scale(scale, scale)
+        surface.set_device_offset(-left * scale, -top * scale)
+        layer_context = cairo.Context(surface)
+        layer_context.set_font_options(font_options)
+        draw(layer_context, width, height)
+        return surface
+
+    def _render_layers(self, jobs):
+        """Run :meth:`_render_layer` for each job, in parallel if there are
+        several and more than one render thread.
+
+        The caches of ticks, histograms, text layouts and marker images are
+        shared by the threads, and the text layouts are drawn by several threads
+        at once."""
+        threads = self.render_threads or os.cpu_count() or 1
+        if threads == 1 or len(jobs) < 2:
+            return [self._render_layer(*job) for job in jobs]
+        # pycairo and numpy release the GIL while rasterizing and transforming
+        return list(
+            _get_executor(threads).map(lambda job: self._render_layer(*job), jobs)
+        )
+
+    def _visible_traces(self):
+        index = 0
+        for position, (plot, signature) in enumerate(
+            zip(self.data, self._trace_signatures)
+        ):
+            if not plot["visible"]:
+                continue
+
+            if "_visible" in plot and not plot["_visible"]:
+                index += 1
+                continue
+
+            yield position, plot, index, signature
+            index += 1
+
+    def _axis_states(self, plot):
+        return tuple(
+            freeze([axis.get(key) for key in ["type", *_LAYOUT_STATE]])
+            for axis in self._get_axes(plot)
+        )
+
+    def _composite_traces(self, context, width, height, traces):
+        for name, plot, index, key, version in traces:
+            self._draw_appended(name, key, version, plot, index)
+            self._trace_versions[name] = version
+
+        # Each trace, in order until the budget is used, is drawn into a surface
+        # covering its subplot, and those which are out of date are drawn in
+        # parallel before compositing them in order. The rest are drawn directly.
+        cached = []
+        used = 0
+        for i, (_, plot, _, key, _) in enumerate(traces):
+            size = self._surface_bytes(self._trace_bounds(plot, width, height), key)
+            if used + size <= _TRACE_CACHE_BYTES:
+                cached.append(i)
+                used += size
+        self._evict_traces(
+            {name for name, *_ in traces},
+            {traces[i][0] for i in cached},
+            _TRACE_CACHE_BYTES - used,
+        )
+
+        stale = [
+            i
+            for i in cached
+            if traces[i][0] not in self._layers
+            or self._layers[traces[i][0]][0] != traces[i][3]
+        ]
+        font_options = context.get_font_options()
+        surfaces = self._render_layers(
+            [
+                (
+                    traces[i][3],
+                    functools.partial(
+                        self._plot_trace, plot=traces[i][1], index=traces[i][2]
+                    ),
+                    font_options,
+                    self._trace_bounds(traces[i][1], width, height),
+                )
+                for i in stale
+            ]
+        )
+        for i, surface in zip(stale, surfaces):
+            self._layers[traces[i][0]] = (traces[i][3], surface)
+        cached = set(cached)
+        for i, (name, plot, index, _, _) in enumerate(traces):
+            if i not in cached:
+                self._plot_trace(context, width, height, plot, index)
+                continue
+            # Moved to the end, so that the layers are in least recently used order
+            self._layers[name] = self._layers.pop(name)
+            context.set_source_surface(self._layers[name][1], 0, 0)
+            context.paint()
+
+    @staticmethod
+    def _surface_bytes(bounds, key):
+        """The memory used by a surface from :meth:`_render_layer`."""
+        scale = key[0][2]
+        left, top, right, bottom = bounds
+        return cairo.ImageSurface.format_stride_for_width(
+            cairo.FORMAT_ARGB32, math.ceil((right - left) * scale)
+        ) * math.ceil((bottom - top) * scale)
+
+    def _evict_traces(self, shown, keep, room):
+        """Drop the surfaces of traces which no longer exist, or are `shown` but not
+        to be kept, and then the least recently used of those of hidden traces
+        until they fit in `room` bytes.
+
+        The surfaces of hidden traces are kept while there is room, so that
+        showing them again is only a composite."""
+        names = [
+            name
+            for name in self._layers
+            if isinstance(name, tuple) and name not in keep
+        ]
+        for name in names:
+            if name[1] >= len(self.data) or name in shown:
+                del self._layers[name]
+                self._trace_versions.pop(name, None)
+        used = sum(
+            surface.get_stride() * surface.get_height()
+            for name, (_, surface) in self._layers.items()
+            if isinstance(name, tuple) and name not in keep
+        )
+        for name in names:
+            if used <= room:
+                break
+            if name in self._layers:
+                surface = self._layers.pop(name)[1]
+                self._trace_versions.pop(name, None)
+                used -= surface.get_stride() * surface.get_height()
+
+    def _trace_bounds(self, plot, width, height):
+        xaxis, yaxis = self._get_axes(plot)
+        if "_range" not in xaxis or "_range" not in yaxis:
+            return 0, 0, width, height
+        left, right, top, bottom = self._plot_area(xaxis, yaxis, width, height)
+        return (
+            max(math.floor(left), 0),
+            max(math.floor(top), 0),
+            min(math.ceil(right), width),
+            min(math.ceil(bottom), height),
+        )
 
-        width = area.get_size(Gtk.Orientation.HORIZONTAL)
-        height = area.get_size(Gtk.Orientation.VERTICAL)
+    def _draw_appended(
+        self, name, key, version, plot, index
+    ):  # pylint: disable=too-many-arguments
+        """Draw the points appended to a trace onto its cached surface, or drop the
+        surface if the trace has changed in any other way."""
+        if name not in self._layers or self._layers[name][0] != key:
+            return
+        drawn = self._trace_versions.get(name)
+        if drawn == version:
+            return
+        data, _ = version
+        appended = (
+            data.appended_since(drawn[1])
+            if drawn is not None and data is not None and drawn[0] is data
+            else None
+        )
+        if appended is None:
+            del self._layers[name]
+        elif appended > 0:
+            width, height, *_ = key[0]
+            self._plot_trace(
+                cairo.Context(self._layers[name][1]),
+                width,
+                height,
+                plot,
+                index,
+                start=max(len(plot["_data"].x) - appended - 1, 0),
+            )
 
+    def _draw_background(self, context, width, height):
         self._draw_bg(context, width, height)
         self._draw_grid(context, width, height)
-        self._plot(context, width, height)
+
+    def _draw_axes_and_ticks(self, context, width, height):
         self._draw_axes(context, width, height)
         self._draw_all_ticks(context, width, height)
 
@@ -171,8 +520,7 @@ class _PlotlyGtk(Gtk.DrawingArea):
 
         context.set_source_rgb(*parse_color(font_dict["color"]))
         font = parse_font(font_dict)
-        layout = PangoCairo.create_layout(context)
-        layout.set_font_description(font)
+        update_context(context)
         if axis.startswith("x"):
             x = tickvals
             if "anchor" in self.layout[axis] and self.layout[axis]["anchor"] != "free":
@@ -193,10 +541,9 @@ class _PlotlyGtk(Gtk.DrawingArea):
 
             for tick, text in zip(x_pos, ticktext):
                 context.move_to(tick, y_pos)
-                layout.set_markup(text)
-                layout_size = layout.get_pixel_size()
+                layout, layout_size = text_layout(font, str(text), markup=True)
                 context.rel_move_to(-layout_size[0] / 2, 0)
-                PangoCairo.show_layout(context, layout)
+                show_layout(context, layout)
 
         else:
             y = tickvals
@@ -231,13 +578,12 @@ class _PlotlyGtk(Gtk.DrawingArea):
 
             for tick, text in zip(y_pos, ticktext):
                 context.move_to(x_pos, tick)
-                layout.set_markup(text)
-                layout_size = layout.get_pixel_size()
+                layout, layout_size = text_layout(font, str(text), markup=True)
                 if "side" in self.layout[axis] and self.layout[axis]["side"] == "right":
                     context.rel_move_to(0, -layout_size[1] / 2)
                 else:
                     context.rel_move_to(-layout_size[0], -layout_size[1] / 2)
-                PangoCairo.show_layout(context, layout)
+                show_layout(context, layout)
 
     def _draw_axes(self, context, width, height):
         axes = [k for k in self.layout if "axis" in k]
@@ -308,12 +654,8 @@ class _PlotlyGtk(Gtk.DrawingArea):
             xaxis = self.layout[xaxis] if xaxis in self.layout else None
         if isinstance(yaxis, str):
             yaxis = self.layout[yaxis] if yaxis in self.layout else None
-        log_x = (
-            xaxis["type"] == "log" if xaxis is not None and "type" in xaxis else False
-        )
-        log_y = (
-            yaxis["type"] == "log" if yaxis is not None and "type" in yaxis else False
-        )
+        log_x = self._is_log(xaxis)
+        log_y = self._is_log(yaxis)
 
         if log_x and not ignore_log_x:
             x = np.log10(x)
@@ -365,48 +707,59 @@ class _PlotlyGtk(Gtk.DrawingArea):
 
         return x_pos, y_pos
 
+    @staticmethod
+    def _is_log(axis):
+        return axis is not None and "type" in axis and axis["type"] == "log"
+
     def _set_trace_color(self, context, plot, index):
-        if "marker" in plot and "color" in plot["marker"]:
-            color = plot["marker"]["color"]
+        if (
+            "marker" in plot
+            and "color" in plot["marker"]
+            and isinstance(plot["marker"]["color"], str)
+        ):
+            context.set_source_rgb(*parse_color(plot["marker"]["color"]))
         else:
-            color = self.layout["template"]["layout"]["colorway"][index]
-        context.set_source_rgb(*parse_color(color))
-
-    def _plot(self, context, width, height):
-        index = 0
-        for plot in self.data:
-            plot_type = plot["type"]
-            if not plot["visible"]:
-                continue
+            context.set_source_rgb(*self.layout["_colorway"][index])
 
-            if "_visible" in plot and not plot["_visible"]:
-                index += 1
-                continue
-
-            self._set_trace_color(context, plot, index)
-            if plot_type in ["scatter", "scattergl"]:
-                self._plot_scatter(context, width, height, plot, index)
-            elif plot_type == "histogram":
-                self._plot_histogram(context, width, height, plot, index)
-            index += 1
+    def _plot_trace(
+        self, context, width, height, plot, index, start=0
+    ):  # pylint: disable=too-many-arguments
+        xaxis, yaxis = self._get_axes(plot)
+        context.save()
+        if "_range" in xaxis and "_range" in yaxis:
+            left, right, top, bottom = self._plot_area(xaxis, yaxis, width, height)
+            context.rectangle(left, top, right - left, bottom - top)
+            context.clip()
+
+        self._set_trace_color(context, plot, index)
+        if plot["type"] in ["scatter", "scattergl"]:
+            self._plot_scatter(context, width, height, plot, index, start)
+        elif plot["type"] == "histogram":
+            self._plot_histogram(context, width, height, plot, index)
+        context.restore()
 
     def _plot_histogram(
         self, context, width, height, plot, index
     ):  # pylint: disable=too-many-arguments,unused-argument
-        for i in range(0, len(plot["y"])):
-            x = [plot["x"][i], plot["x"][i], plot["x"][i + 1], plot["x"][i + 1]]
-            y = [0, plot["y"][i], plot["y"][i], 0]
-
-            xaxis, yaxis = self._get_axes(plot)
-
-            x_pos, y_pos = self._calc_pos(x, y, width, height, xaxis, yaxis)
-            context.new_path()
-
-            for i in range(0, 4):
-                context.line_to(x_pos[i], y_pos[i])
-
-            context.close_path()
-            context.fill()
+        xaxis, yaxis = self._get_axes(plot)
+        edges = plot["_data"].values("x", self._is_log(xaxis))
+        counts = plot["_data"].y
+        baseline = 0
+        if self._is_log(yaxis):
+            baseline = min(yaxis["_range"])
+            counts = plot["_data"].log10("y")
+            counts = np.where(np.isfinite(counts), counts, baseline)
+
+        x, y = bar_outline(edges, counts, baseline)
+        x_pos, y_pos = self._calc_pos(
+            x, y, width, height, xaxis, yaxis, ignore_log_x=True, ignore_log_y=True
+        )
+        context.new_path()
+        collections.deque(
+            map(context.line_to, x_pos.tolist(), y_pos.tolist()), maxlen=0
+        )
+        context.close_path()
+        context.fill()
 
     def _get_axes(self, plot):
         xaxis = plot["xaxis"] if "xaxis" in plot else "x"
@@ -419,8 +772,34 @@ class _PlotlyGtk(Gtk.DrawingArea):
 
         return xaxis, yaxis
 
+    def _plot_area(self, xaxis, yaxis, width, height):
+        x_pos, y_pos = self._calc_pos(
+            np.asarray(xaxis["_range"]),
+            np.asarray(yaxis["_range"]),
+            width,
+            height,
+            xaxis,
+            yaxis,
+            ignore_log_x=True,
+            ignore_log_y=True,
+        )
+        return min(x_pos), max(x_pos), min(y_pos), max(y_pos)
+
+    def _visible_window(
+        self, x, xaxis, width, height, margin
+    ):  # pylint: disable=too-many-arguments
+        x_range = np.array(xaxis["_range"])
+        x_pos, _ = self._calc_pos(
+            x_range, [], width, height, xaxis, None, ignore_log_x=True
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margin = margin * np.abs(
+                (x_range[-1] - x_range[0]) / (x_pos[-1] - x_pos[0])
+            )
+        return visible_slice(x, min(x_range) - margin, max(x_range) + margin)
+
     def _plot_scatter(
-        self, context, width, height, plot, index
+        self, context, width, height, plot, index, start=0
     ):  # pylint: disable=too-many-locals,too-many-arguments,unused-argument
         if "mode" in plot:
             mode = plot["mode"]
@@ -431,31 +810,182 @@ class _PlotlyGtk(Gtk.DrawingArea):
         modes = mode.split("+")
 
         xaxis, yaxis = self._get_axes(plot)
-
-        x_pos, y_pos = self._calc_pos(plot["x"], plot["y"], width, height, xaxis, yaxis)
+        trace_data = plot["_data"]
+        log_x = self._is_log(xaxis)
+        x = trace_data.values("x", log_x)
+        y = trace_data.values("y", self._is_log(yaxis))
+
+        marker = plot["marker"]
+        size = (
+            marker["size"]
+            if trace_data.size is None
+            else trace_data.size / marker["sizeref"]
+        )
+        radius = size / 2 if marker["sizemode"] == "diameter" else np.sqrt(size / np.pi)
+        radius = np.broadcast_to(radius, x.shape)
+        symbol = marker["symbol"]
+        if isinstance(symbol, (list, tuple, np.ndarray)):
+            symbol = np.broadcast_to(np.asarray(symbol, dtype=object), x.shape)
+        if start:
+            x, y, radius = x[start:], y[start:], radius[start:]
+            if isinstance(symbol, np.ndarray):
+                symbol = symbol[start:]
+
+        if trace_data.is_sorted("x", log_x) and len(x) > 0:
+            margin = plot["line"]["width"] if "lines" in modes else 0
+            if "markers" in modes:
+                margin = max(margin, np.nanmax(radius))
+            window = self._visible_window(x, xaxis, width, height, margin)
+            x, y, radius = x[window], y[window], radius[window]
+            if isinstance(symbol, np.ndarray):
+                symbol = symbol[window]
+
+        x_pos, y_pos = self._calc_pos(
+            x,
+            y,
+            width,
+            height,
+            xaxis,
+            yaxis,
+            ignore_log_x=True,
+            ignore_log_y=True,
+        )
 
         if "markers" in modes:
-            context.new_path()
-            if not isinstance(plot["marker"]["size"], (list, np.ndarray)):
-                size = np.array([plot["marker"]["size"]] * len(plot["x"]))
-            else:
-                size = np.array(plot["marker"]["size"]) / plot["marker"]["sizeref"]
-            radius = (
-                size / 2
-                if plot["marker"]["sizemode"] == "diameter"
-                else np.sqrt(size / np.pi)
+            visible = in_bounds(
+                x_pos, y_pos, self._plot_area(xaxis, yaxis, width, height), radius
+            )
+            self._draw_markers(
+                context,
+                group_markers(
+                    x_pos[visible],
+                    y_pos[visible],
+                    radius[visible],
+                    symbol[visible] if isinstance(symbol, np.ndarray) else symbol,
+                    1 / context.get_target().get_device_scale()[0],
+                ),
+                max(marker.get("line", {}).get("width", 1), 1),
             )
+        if "lines" in modes:
+            line = plot["line"]
+            if (
+                line["simplify"]
+                and line["shape"] in ["linear", "spline"]
+                and len(x_pos) > 4 * width
+            ):
+                keep = decimate(
+                    x_pos, y_pos, 1 / context.get_target().get_device_scale()[0]
+                )
+                x_pos = x_pos[keep]
+                y_pos = y_pos[keep]
+            context.set_line_width(line["width"])
+            self._draw_line(context, x_pos, y_pos, line["shape"], line["smoothing"])
+
+    @staticmethod
+    def _draw_line(
+        context, x_pos, y_pos, shape, smoothing
+    ):  # pylint: disable=too-many-arguments
+        x_pos, y_pos = step_vertices(x_pos, y_pos, shape)
+        context.new_path()
+        for start, stop in finite_segments(x_pos, y_pos).tolist():
+            if stop - start < 2:
+                continue
+            x_segment = x_pos[start:stop]
+            y_segment = y_pos[start:stop]
+            context.move_to(x_segment[0], y_segment[0])
+            if shape == "spline" and smoothing > 0:
+                collections.deque(
+                    map(
+                        context.curve_to,
+                        *(
+                            control.tolist()
+                            for control in spline_controls(
+                                x_segment, y_segment, smoothing
+                            )
+                        ),
+                        x_segment[1:].tolist(),
+                        y_segment[1:].tolist(),
+                    ),
+                    maxlen=0,
+                )
+            else:
+                collections.deque(
+                    map(
+                        context.line_to,
+                        x_segment[1:].tolist(),
+                        y_segment[1:].tolist(),
+                    ),
+                    maxlen=0,
+                )
+        context.stroke()
 
-            for x, y, r in zip(x_pos, y_pos, radius):
-                if np.isnan(x) or np.isnan(y):
-                    continue
-                context.arc(x, y, r, 0, 2 * np.pi)
+    @staticmethod
+    def _stamp_circles(
+        context, x_pos, y_pos, radius, is_open, is_dot, line_width
+    ):  # pylint: disable=too-many-arguments
+        """Paint circle markers from an image of one marker, which is much faster
+        than filling a path of arcs when there are many of them.
+
+        Returns False, without drawing anything, if they should be drawn as paths
+        because there are few of them, the source is not a colour, or the target
+        is a vector surface."""
+        source = context.get_source()
+        target = context.get_target()
+        if (
+            len(x_pos) < _STAMP_MIN_MARKERS
+            or not isinstance(source, cairo.SolidPattern)
+            or not isinstance(target, cairo.ImageSurface)
+        ):
+            return False
+        scale = target.get_device_scale()[0]
+        stamp = _circle_stamp(
+            radius, is_open, is_dot, line_width, scale, source.get_rgba()
+        )
+        # Positioned on whole device pixels, so that the image is copied exactly
+        centre = stamp.get_width() / scale / 2
+        left = np.round((x_pos - centre) * scale) / scale
+        top = np.round((y_pos - centre) * scale) / scale
+
+        def paint(x, y):
+            context.set_source_surface(stamp, x, y)
+            context.paint()
+
+        collections.deque(map(paint, left.tolist(), top.tolist()), maxlen=0)
+        context.set_source(source)
+        return True
+
+    @staticmethod
+    def _draw_markers(context, groups, line_width):
+        context.new_path()
+        for symbol, radius, x_pos, y_pos in groups:
+            name, is_open, is_dot = parse_symbol(symbol)
+            vertices = MARKER_SYMBOLS[name]
+            if vertices is None and _Chart._stamp_circles(
+                context, x_pos, y_pos, radius, is_open, is_dot, line_width
+            ):
+                continue
+            if vertices is None:
+                for x, y in zip(x_pos.tolist(), y_pos.tolist()):
+                    context.new_sub_path()
+                    context.arc(x, y, radius, 0, 2 * np.pi)
+            else:
+                # Vertices of every marker in the group, shape (markers, vertices, 2)
+                points = (
+                    np.stack((x_pos, y_pos), axis=-1)[:, None, :] + radius * vertices
+                ).tolist()
+                for first, *rest in points:
+                    context.move_to(*first)
+                    for point in rest:
+                        context.line_to(*point)
+                    if not name.startswith("line-"):
+                        context.close_path()
+            if is_open:
+                context.set_line_width(line_width)
+                context.stroke()
+            else:
+                context.fill()
+            if is_dot:
+                for x, y in zip(x_pos.tolist(), y_pos.tolist()):
+                    context.new_sub_path()
+                    context.arc(x, y, max(radius / 4, line_width), 0, 2 * np.pi)
                 context.fill()
-        if "lines" in modes:
-            context.set_line_width(plot["line"]["width"])
-            for x, y in zip(x_pos, y_pos):
-                if np.isnan(x) or np.isnan(y):
-                    context.stroke()
-                    continue
-                context.line_to(x, y)
-            context.stroke()
@@ -0,0 +1,920 @@
+"""Contains a private class which prepares a plotly figure for drawing, without
+using GTK, so that it can be done in a worker thread."""
+
+import concurrent.futures
+import numbers
+import threading
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+from plotly_gtk.utils import *  # pylint: disable=wildcard-import, unused-wildcard-import
+from plotly_gtk.utils.data import TraceData, detect_axis_type, to_timestamps
+from plotly_gtk.utils.histogram import cached_histogram
+from plotly_gtk.utils.text import text_size
+from plotly_gtk.utils.ticks import Ticks
+
+if TYPE_CHECKING:
+    from plotly import graph_objects as go
+
+
+def prepare_figure(
+    fig: "go.Figure | dict", cancelled: threading.Event | None = None
+) -> "_Figure":
+    """Prepare a figure for drawing.
+
+    Parameters
+    ----------
+    fig: go.Figure | dict
+        The figure
+    cancelled: threading.Event | None
+        An event which is set to stop the preparation
+
+    Returns
+    -------
+    _Figure
+        The prepared figure
+
+    Raises
+    ------
+    concurrent.futures.CancelledError
+        If `cancelled` is set before the preparation is finished
+    """
+    figure = _Figure()
+    figure._prepare(fig, cancelled)  # pylint: disable=protected-access
+    return figure
+
+
+class _Figure:
+    """The data and layout of a figure, with defaults filled in, values converted
+    to numbers, histograms binned and axis ranges and ticks calculated."""
+
+    data: list[dict]
+    layout: dict
+    fig: dict
+    _cancelled: threading.Event | None = None
+
+    def _prepare(self, fig: "go.Figure | dict", cancelled: threading.Event | None):
+        self._cancelled = cancelled
+        if not isinstance(fig, dict):
+            fig = fig.to_dict()
+
+        self.data = fig["data"]
+
+        self.layout = fig["layout"]
+        if self.layout is None:
+            self.layout = {}
+        self._update_layout()
+        fig["layout"] = self.layout
+        fig["layout"]["_margin"] = dict(self.layout["margin"])
+
+        self._prepare_data()
+        fig["data"] = self.data
+        self.fig = fig
+
+        self._update_data()
+        self._update_positions_and_domains()
+        self._cancelled = None
+
+    def _check_cancelled(self):
+        if self._cancelled is not None and self._cancelled.is_set():
+            raise concurrent.futures.CancelledError
+
+    def _update_data(self):
+        for plot in self.data:
+            self._check_cancelled()
+            self._update_trace_data(plot)
+        self._update_ranges()
+
+    def _update_ranges(self):
+        axes = [k for k in self.layout if "axis" in k]
+        for axis in axes:
+            if "autorange" in self.layout[axis]:
+                autorange = self.layout[axis]["autorange"]
+            if "range" in self.layout[axis] and len(self.layout[axis]["range"]) == 2:
+                autorange = False
+            else:
+                autorange = True
+
+            axis_letter = axis[0 : axis.find("axis")]
+
+            plots_on_axis = [
+                plot
+                for plot in self._axis_traces.get(axis, [])
+                if "visible" not in plot or plot["visible"]
+            ]
+            hidden_plots_on_axis = [
+                plot
+                for plot in plots_on_axis
+                if "_visible" not in plot or plot["_visible"]
+            ]
+            if len(plots_on_axis) > 1:
+                plots_on_axis = hidden_plots_on_axis
+            if plots_on_axis == []:
+                continue
+
+            if autorange:
+                extents = np.array(
+                    [plot["_data"].extent(axis_letter) for plot in plots_on_axis]
+                )
+                _range = [np.nanmin(extents[:, 0]), np.nanmax(extents[:, -1])]
+                if _range[0] == _range[-1]:
+                    _range[0] = _range[0] - 1
+                    _range[-1] = _range[1] + 1
+                self.layout[axis]["_range"] = _range
+            else:
+                if self.layout[axis]["type"] == "log":
+                    self.layout[axis]["_range"] = np.array(
+                        [
+                            10 ** self.layout[axis]["range"][0],
+                            10 ** self.layout[axis]["range"][-1],
+                        ]
+                    )
+                else:
+                    self.layout[axis]["_range"] = np.array(self.layout[axis]["range"])
+
+        # Do matching
+        matched_to_axes = {
+            self.layout[axis]["matches"]
+            for axis in axes
+            if "matches" in self.layout[axis]
+        }
+        match_groups = {
+            axis: [
+                ax
+                for ax in axes
+                if ax == axis[0] + "axis" + axis[1:]
+                or ("matches" in self.layout[ax] and self.layout[ax]["matches"] == axis)
+            ]
+            for axis in matched_to_axes
+        }
+        for match_group in match_groups.values():
+            _ranges = [self.layout[axis]["_range"] for axis in match_group]
+            _range = [min(r[0] for r in _ranges), max(r[-1] for r in _ranges)]
+            for axis in match_group:
+                self.layout[axis]["_range"] = _range
+
+        for axis in axes:
+            if "_range" not in self.layout[axis]:
+                continue
+            if self.layout[axis]["_type"] == "log":
+                self.layout[axis]["_range"] = np.log10(self.layout[axis]["_range"])
+                range_length = (
+                    self.layout[axis]["_range"][-1] - self.layout[axis]["_range"][0]
+                )
+                if (
+                    "range" in self.layout[axis]
+                    and len(self.layout[axis]["range"]) == 2
+                ):
+                    range_addon = range_length * 0.001
+                else:
+                    range_addon = range_length * 0.125 / 2
+                self.layout[axis]["_range"] = [
+                    self.layout[axis]["_range"][0] - range_addon,
+                    self.layout[axis]["_range"][-1] + range_addon,
+                ]
+            else:
+                range_length = (
+                    self.layout[axis]["_range"][-1] - self.layout[axis]["_range"][0]
+                )
+                if (
+                    "range" in self.layout[axis]
+                    and len(self.layout[axis]["range"]) == 2
+                ):
+                    range_addon = range_length * 0.001
+                else:
+                    range_addon = range_length * 0.125 / 2
+                self.layout[axis]["_range"] = [
+                    self.layout[axis]["_range"][0] - range_addon,
+                    self.layout[axis]["_range"][-1] + range_addon,
+                ]
+            if "_ticksobject" not in self.layout[axis]:
+                self.layout[axis]["_ticksobject"] = Ticks(
+                    self.layout,
+                    axis,
+                    0,
+                )
+                self.layout[axis]["_ticksobject"].calculate()
+            else:
+                self.layout[axis]["_ticksobject"].calculate()
+
+    def _prepare_data(self):
+        plots = []
+        for plot in self.data:
+            self._check_cancelled()
+            if plot["type"] in ["scatter", "scattergl"]:
+                defaults = dict(
+                    visible=True,
+                    showlegend=True,
+                    legend="legend",
+                    legendrank=1000,
+                    legendgroup="",
+                    legendgrouptitle=dict(),
+                    opacity=1,
+                    zorder=0,
+                    text="",
+                    textposition="middle center",
+                    texttemplate="",
+                    hovertext="",
+                    hoverinfo="all",
+                    hovertemplate="",
+                    xhoverformat="",
+                    yhoverformat="",
+                    xaxis="x",
+                    yaxis="y",
+                    marker=dict(
+                        angle=0,
+                        angleref="up",
+                        autocolorscale=True,
+                        cauto=True,
+                        colorbar=dict(),
+                        line=dict(
+                            autocolorscale=True,
+                            cauto=True,
+                        ),
+                        size=6,
+                        sizemin=0,
+                        sizemode="diameter",
+                        sizeref=1,
+                        standoff=0,
+                        symbol="circle",
+                    ),
+                    line=dict(
+                        backoff="auto",
+                        dash="solid",
+                        shape="linear",
+                        simplify=True,
+                        smoothing=1,
+                        width=2,
+                    ),
+                    textfont=dict(),
+                )
+                plot = update_dict(defaults, plot)
+                self._update_trace_data(plot)
+            elif plot["type"] == "histogram":
+                defaults = dict(
+                    xaxis="x",
+                    yaxis="y",
+                    visible=True,
+                    nbinsx=0,
+                    xbins=dict(),
+                    histfunc="count",
+                    histnorm="",
+                    cumulative=dict(
+                        enabled=False, direction="increasing", currentbin="include"
+                    ),
+                )
+                plot = update_dict(defaults, plot)
+                sources = (plot.get("x"), plot.get("y"))
+                self._update_trace_data(plot)
+                self._bin_histogram(plot, sources)
+            else:
+                raise NotImplementedError(f"{plot["type"]} not yet implemented")
+            plots.append(plot)
+        self.data = plots
+        self._index_axes()
+
+    def _index_axes(self):
+        self._axis_traces = {}
+        for plot in self.data:
+            for axis_letter in ["x", "y"]:
+                if f"{axis_letter}axis" not in plot:
+                    continue
+                axis = plot[f"{axis_letter}axis"].replace(
+                    axis_letter, f"{axis_letter}axis"
+                )
+                self._axis_traces.setdefault(axis, []).append(plot)
+
+    def _update_trace_data(self, plot):
+        if "_data" not in plot:
+            plot["_data"] = TraceData()
+        trace_data = plot["_data"]
+        for axis_letter in ["x", "y"]:
+            if axis_letter not in plot or trace_data.is_current(
+                axis_letter, plot[axis_letter]
+            ):
+                continue
+            values = plot[axis_letter]
+            axis = plot[f"{axis_letter}axis"].replace(axis_letter, f"{axis_letter}axis")
+            if self.layout[axis]["_type"] == "date":
+                values = to_timestamps(values)
+            plot[axis_letter] = trace_data.set(axis_letter, values)
+
+        marker = plot["marker"] if "marker" in plot else {}
+        for key in ["size", "color"]:
+            values = (
+                marker[key]
+                if key in marker and isinstance(marker[key], (list, np.ndarray))
+                else None
+            )
+            if not trace_data.is_current(key, values):
+                values = trace_data.set(key, values)
+                if values is not None:
+                    marker[key] = values
+
+    def _bin_histogram(self, plot, sources):
+        if "binned" not in plot or not plot["binned"]:
+            xbins = dict(plot["xbins"])
+            xaxis = plot["xaxis"].replace("x", "xaxis")
+            if self.layout[xaxis]["_type"] == "date":
+                for key in ["start", "end"]:
+                    if key in xbins:
+                        xbins[key] = to_timestamps([xbins[key]])[0]
+                if isinstance(xbins.get("size"), numbers.Number):
+                    xbins["size"] = xbins["size"] / 1e3
+            plot["_binspec"] = dict(
+                nbins=plot["nbinsx"],
+                start=xbins.get("start"),
+                end=xbins.get("end"),
+                size=(
+                    xbins["size"]
+                    if isinstance(xbins.get("size"), numbers.Number)
+                    else None
+                ),
+                histfunc=plot["histfunc"],
+                date=self.layout[xaxis]["_type"] == "date",
+            )
+            plot["_samples"] = (plot["_data"].x, plot["_data"].y)
+            edges, values, categories = cached_histogram(
+                sources,
+                plot["_data"].x,
+                plot["_data"].y,
+                **plot["_binspec"],
+                histnorm=plot["histnorm"],
+                cumulative=self._cumulative(plot),
+            )
+            plot["x"] = plot["_data"].set("x", edges)
+            plot["y"] = plot["_data"].set("y", values)
+            if categories is not None:
+                plot["_categories"] = categories
+                # The bins are at 0, 1, 2, ..., so they are labelled with the names
+                # of the categories unless the axis has its own tick labels
+                axis_layout = self.layout[xaxis]
+                if axis_layout.get("tickmode") != "array":
+                    axis_layout["tickmode"] = "array"
+                    axis_layout["tickvals"] = np.arange(len(categories))
+                    axis_layout["ticktext"] = [str(category) for category in categories]
+            plot["binned"] = True
+
+    @staticmethod
+    def _cumulative(plot):
+        cumulative = plot["cumulative"]
+        return (
+            cumulative["enabled"],
+            cumulative["direction"],
+            cumulative["currentbin"],
+        )
+
+    def _update_layout(self):
+        xaxes = {
+            trace["xaxis"].replace("x", "xaxis")
+            for trace in self.data
+            if "xaxis" in trace
+        }
+        yaxes = {
+            trace["yaxis"].replace("y", "yaxis")
+            for trace in self.data
+            if "yaxis" in trace
+        }
+        xaxes.add("xaxis")
+        yaxes.add("yaxis")
+
+        template = self.layout["template"]["layout"]
+        defaults = dict(
+            font=dict(
+                color="#444",
+                family='"Open Sans", verdana, arial, sans-serif',
+                size=12,
+                style="normal",
+                variant="normal",
+                weight="normal",
+            ),
+            legend=dict(
+                bordercolor="#444",
+                borderwidth=0,
+                entrywidth=0,
+                entrywidthmode="pixels",
+                font=dict(
+                    color="#444",
+                    family='"Open Sans", verdana, arial, sans-serif',
+                    size=12,
+                    style="normal",
+                    variant="normal",
+                    weight="normal",
+                ),
+                groupclick="togglegroup",
+                grouptitlefont=dict(
+                    color="#444",
+                    family='"Open Sans", verdana, arial, sans-serif',
+                    size=12,
+                    style="normal",
+                    variant="normal",
+                    weight="normal",
+                ),
+                indentation=0,
+                itemclick="toggle",
+                itemdoubleclick="toggleothers",
+                itemsizing="trace",
+                itemwidth=30,
+                orientation="v",
+                title=dict(
+                    font=dict(
+                        color="#444",
+                        family='"Open Sans", verdana, arial, sans-serif',
+                        size=12,
+                        style="normal",
+                        variant="normal",
+                        weight="normal",
+                    ),
+                    text="",
+                ),
+                tracegroupgap=10,
+                traceorder="",
+                valign="middle",
+                visible=True,
+                xanchor="left",
+                xref="paper",
+                yanchor="auto",
+                yref="paper",
+            ),
+            margin=dict(autoexpand=True, t=100, l=80, r=80, b=80),
+            xaxis=dict(
+                anchor="y",
+                automargin=True,
+                autorange=True,
+                autotickangles=[0, 30, 90],
+                color="#444",
+                domain=[0, 1],
+                gridcolor="#eee",
+                griddash="solid",
+                gridwidth=1,
+                hoverformt="",
+                layer="above traces",
+                linecolor="#444",
+                linewidth=1,
+                minexponent=3,
+                minor=dict(),
+                mirror=False,
+                nticks=0,
+                position=0,
+                rangemode="normal",
+                showgrid=True,
+                showline=True,
+                showticklabels=True,
+                showtickprefix="all",
+                showticksuffix="all",
+                side="bottom",
+                tickangle="auto",
+                tickfont=dict(style="normal", variant="normal", weight="normal"),
+                tickformat="",
+                ticklabelmode="instant",
+                ticklabelposition="outside",
+                ticklabelstep=1,
+                ticklen=5,
+                tickprefix="",
+                ticks="",
+                tickson="labels",
+                ticksuffix="",
+                tickwidth=1,
+                title=dict(
+                    font=dict(style="normal", variant="normal", weight="normal")
+                ),
+                type="-",
+                zerolinecolor="#444",
+                zerolinewidth=1,
+            ),
+            yaxis=dict(
+                anchor="x",
+                automargin=True,
+                autorange=True,
+                autotickangles=[0, 30, 90],
+                color="#444",
+                domain=[0, 1],
+                gridcolor="#eee",
+                griddash="solid",
+                gridwidth=1,
+                hoverformt="",
+                layer="above traces",
+                linecolor="#444",
+                linewidth=1,
+                minexponent=3,
+                minor=dict(),
+                mirror=False,
+                nticks=0,
+                position=0,
+                rangemode="normal",
+                showgrid=True,
+                showline=True,
+                showticklabels=True,
+                showtickprefix="all",
+                showticksuffix="all",
+                side="left",
+                tickangle="auto",
+                tickfont=dict(style="normal", variant="normal", weight="normal"),
+                tickformat="",
+                ticklabelmode="instant",
+                ticklabelposition="outside",
+                ticklabelstep=1,
+                ticklen=5,
+                tickprefix="",
+                ticks="",
+                tickson="labels",
+                ticksuffix="",
+                tickwidth=1,
+                title=dict(
+                    font=dict(style="normal", variant="normal", weight="normal")
+                ),
+                type="-",
+                zerolinecolor="#444",
+                zerolinewidth=1,
+            ),
+        )
+        for xaxis in xaxes:
+            if xaxis not in self.layout:
+                self.layout[xaxis] = {}
+            if "type" not in self.layout[xaxis]:
+                first_plot_on_axis = [
+                    trace
+                    for trace in self.data
+                    if "xaxis" not in trace
+                    or trace["xaxis"] == xaxis.replace("axis", "")
+                ][0]
+                self.layout[xaxis]["_type"] = (
+                    self._detect_axis_type(first_plot_on_axis["x"])
+                    if "x" in first_plot_on_axis
+                    else "linear"
+                )
+            else:
+                self.layout[xaxis]["_type"] = self.layout[xaxis]["type"]
+            if (
+                "side" in self.layout[xaxis]
+                and self.layout[xaxis]["side"] == "top"
+                and "position" not in self.layout[xaxis]
+            ):
+                self.layout[xaxis]["position"] = 1
+            template[xaxis] = template["xaxis"]
+            defaults[xaxis] = defaults["xaxis"]
+        for yaxis in yaxes:
+            if yaxis not in self.layout:
+                self.layout[yaxis] = {}
+            if "type" not in self.layout[yaxis]:
+                first_plot_on_axis = [
+                    trace
+                    for trace in self.data
+                    if "yaxis" not in trace
+                    or trace["yaxis"] == yaxis.replace("axis", "")
+                ][0]
+                self.layout[yaxis]["_type"] = (
+                    self._detect_axis_type(first_plot_on_axis["y"])
+                    if "y" in first_plot_on_axis
+                    else "linear"
+                )
+            else:
+                self.layout[yaxis]["_type"] = self.layout[yaxis]["type"]
+            if (
+                "side" in self.layout[yaxis]
+                and self.layout[yaxis]["side"] == "right"
+                and "position" not in self.layout[yaxis]
+            ):
+                self.layout[yaxis]["position"] = 1
+            template[yaxis] = template["yaxis"]
+            defaults[yaxis] = defaults["yaxis"]
+        self.layout = update_dict(template, self.layout)
+        self.layout = update_dict(defaults, self.layout)
+        self.layout["_colorway"] = parse_colorway(
+            tuple(self.layout["template"]["layout"].get("colorway", []))
+        )
+
+    def _update_positions_and_domains(self):
+        axes = [k for k in self.layout if "axis" in k]
+        axes_order = []
+        overlayed = []
+        for axis in axes:
+            if "overlaying" in self.layout[axis]:
+                ax = self.layout[axis]["overlaying"]
+                overlayed.append(ax[0] + "axis" + ax[1:])
+        overlayed = set(overlayed)
+        for axis in overlayed:
+            overlayed_by = [
+                k
+                for k in axes
+                if "overlaying" in self.layout[k]
+                and self.layout[k]["overlaying"] == axis.replace("axis", "")
+            ]
+            left = [
+                k
+                for k in overlayed_by
+                if "side" in self.layout[k]
+                and self.layout[k]["side"] == "left"
+                or "side" not in self.layout[k]
+            ]
+            right = [
+                k
+                for k in overlayed_by
+                if "side" in self.layout[k] and self.layout[k]["side"] == "right"
+            ]
+            right = sorted(right)
+            left = sorted(left)
+
+            if "side" in self.layout[axis] and self.layout[axis]["side"] == "right":
+                right = [axis] + right
+            else:
+                left = [axis] + left
+
+            for side in [left, right]:
+                if len(side) == 0:
+                    continue
+                self.layout[side[0]]["_overlaying"] = ""
+                for i in range(1, len(side)):
+                    self.layout[side[i]]["_overlaying"] = side[i - 1]
+
+            axes_order += left
+            axes_order += right
+
+        other_axes = set(axes) - set(axes_order)
+
+        axes_order = sorted(list(other_axes)) + axes_order
+
+        for axis in axes_order:
+            if "linecolor" not in self.layout[axis]:
+                continue
+            overlaying_axis = (
+                self.layout[axis]["_overlaying"]
+                if "_overlaying" in self.layout[axis]
+                else ""
+            )
+            original_overlaying_axis = (
+                self.layout[axis]["overlaying"][0] + "axis" + self.layout[axis]["overlaying"][1:]
+                if "overlaying" in self.layout[axis]
+                else ""
+            )
+            anchor_axis = (
+                "free"
+                if "anchor" not in self.layout[axis]
+                or self.layout[axis]["anchor"] == "free"
+                else (
+                    self.layout[axis]["anchor"][0]
+                    + "axis"
+                    + self.layout[axis]["anchor"][1:]
+                )
+            )
+            domain = (
+                self.layout[axis]["domain"]
+                if "overlaying" not in self.layout[axis]
+                or original_overlaying_axis == ""
+                else self.layout[original_overlaying_axis]["domain"]
+            )
+
+            position = (
+                self.layout[overlaying_axis]["_position"]
+                if "autoshift" in self.layout[axis]
+                and self.layout[axis]["autoshift"]
+                and anchor_axis == "free"
+                else (
+                    self.layout[axis]["position"]
+                    if "anchor" not in self.layout[axis] or anchor_axis == "free"
+                    else (
+                        self.layout[anchor_axis]["domain"][0]
+                        if self.layout[axis]["side"] == "left"
+                        or self.layout[axis]["side"] == "bottom"
+                        else self.layout[anchor_axis]["domain"][-1]
+                    )
+                )
+            )
+            self.layout[axis]["_domain"] = domain
+            self.layout[axis]["_position"] = position
+
+            if "autoshift" in self.layout[axis] and self.layout[axis]["autoshift"]:
+                shift = (
+                    self.layout[axis]["shift"]
+                    if "shift" in self.layout[axis]
+                    else 3 if self.layout[axis]["side"] == "right" else -3
+                )
+                font_extra = 0
+                tickfont = update_dict(
+                    self.layout["font"], self.layout[axis]["tickfont"]
+                )
+                tickfont = parse_font(tickfont)
+                metrics = self._create_pango_context().get_metrics(tickfont)
+                font_height = (
+                    metrics.get_ascent() + metrics.get_descent()
+                ) / Pango.SCALE
+
+                for tick in self.layout[overlaying_axis]["_ticktext"]:
+                    font_extra = max(
+                        text_size(tickfont, str(tick), markup=True)[0], font_extra
+                    )
+                autoshift = (
+                    font_extra
+                    if self.layout[axis]["side"] == "right"
+                    else -font_extra
+                    - self.layout[axis]["title"]["standoff"]
+                    - font_height
+                ) + self.layout[overlaying_axis]["_shift"]
+            else:
+                shift = 0
+                autoshift = 0
+            self.layout[axis]["_shift"] = shift + autoshift
+
+    def _push_margins(
+        self, pushmargins: "Iterable[dict[str, float]]", width: int, height: int
+    ) -> bool:
+        """Grow the margins so that things outside the plot area fit.
+
+        Parameters
+        ----------
+        pushmargins: Iterable[dict[str, float]]
+            The extents of the things which push the margins. l, r, t, and b are
+            their edges as fractions of the plot area, which is between the
+            margins. x and y are the paper positions they are anchored to, and xl,
+            xr, yt and yb are their sizes in pixels on each side of that position.
+        width: int
+            The width of the figure
+        height: int
+            The height of the figure
+
+        Returns
+        -------
+        bool
+            True if the margins changed
+
+        Raises
+        ------
+        NotImplementedError
+            If unimplemented functionality is called for.
+        """
+        margin = dict(self.layout["_margin"])
+        for pushmargin in pushmargins:
+            left = False
+            right = False
+            top = False
+            bottom = False
+
+            padding = 12
+            approximate_padding = 30
+
+            if pushmargin["l"] < 0:
+                left = True
+            if pushmargin["r"] > 1:
+                right = True
+            if pushmargin["t"] < 0:
+                top = True
+            if pushmargin["b"] > 1:
+                bottom = True
+
+            # TODO reimplement to search both margins together # pylint: disable=fixme
+            # >> m.ml
+            # ans = (sym)
+            #
+            #   -pad⋅x₁ - pad⋅x₂ + width⋅x₁ - x₁⋅xr - x₂⋅xl
+            #   ───────────────────────────────────────────
+            #                     x₁ - x₂
+            #
+            # >> m.mr
+            # ans = (sym)
+            #
+            #   pad⋅x₁ + pad⋅x₂ - 2⋅pad - width⋅x₂ + width + x₁⋅xr + x₂⋅xl - xl - xr
+            #   ────────────────────────────────────────────────────────────────────
+            #                                 x₁ - x₂
+
+            if left:
+                if "x" in pushmargin and "xl" in pushmargin:
+                    new = (
+                        pushmargin["x"] * (width - self.layout["margin"]["r"])
+                        - padding
+                        - pushmargin["xl"]
+                    ) / (pushmargin["x"] - 1)
+                else:
+                    new = (
+                        approximate_padding
+                        - (width - self.layout["margin"]["r"]) * pushmargin["l"]
+                    ) / (1 - pushmargin["l"])
+                self.layout["_margin"]["l"] = max(self.layout["_margin"]["l"], new)
+            if right:
+                if "x" in pushmargin and "xr" in pushmargin:
+                    new = (
+                        (pushmargin["x"] - 1) * (width - self.layout["margin"]["l"])
+                        + padding
+                        + pushmargin["xr"]
+                    ) / pushmargin["x"]
+                else:
+                    new = (
+                        approximate_padding
+                        + (width - self.layout["margin"]["l"]) * (pushmargin["r"] - 1)
+                    ) / pushmargin["r"]
+                self.layout["_margin"]["r"] = max(self.layout["_margin"]["r"], new)
+            if top:
+                if "y" in pushmargin and "yt" in pushmargin:
+                    new = (
+                        (pushmargin["y"] - 1) * (height - self.layout["margin"]["b"])
+                        + padding
+                        + pushmargin["yt"]
+                    ) / pushmargin["y"]
+                else:
+                    raise NotImplementedError
+                self.layout["_margin"]["t"] = max(self.layout["_margin"]["t"], new)
+            if bottom:
+                if "y" in pushmargin and "yb" in pushmargin:
+                    new = (
+                        pushmargin["y"] * (height - self.layout["margin"]["t"])
+                        - padding
+                        - pushmargin["yb"]
+                    ) / (pushmargin["y"] - 1)
+                else:
+                    raise NotImplementedError
+                self.layout["_margin"]["b"] = max(self.layout["_margin"]["b"], new)
+        return self.layout["_margin"] != margin
+
+    def _tick_label_pushmargins(self, width: int, height: int) -> list[dict]:
+        """Get the extents of the tick labels as drawn by
+        :meth:`plotly_gtk._chart._Chart.draw`, for :meth:`_push_margins`.
+
+        In :class:`plotly_gtk.chart.PlotlyGtk` the axis titles push the margins
+        out past the tick labels, this is for when there are no titles.
+
+        Parameters
+        ----------
+        width: int
+            The width of the figure
+        height: int
+            The height of the figure
+
+        Returns
+        -------
+        list[dict]
+            The extents of the labels of each axis
+        """
+        plot_width = width - self.layout["_margin"]["l"] - self.layout["_margin"]["r"]
+        plot_height = height - self.layout["_margin"]["t"] - self.layout["_margin"]["b"]
+        pushmargins = []
+        for axis in [k for k in self.layout if "axis" in k]:
+            axis_layout = self.layout[axis]
+            if not axis_layout.get("_ticktext") or not axis_layout.get(
+                "showticklabels", True
+            ):
+                continue
+            font = parse_font(
+                update_dict(
+                    update_dict(self.layout["font"], axis_layout.get("font", {})),
+                    axis_layout.get("tickfont", {}),
+                )
+            )
+            sizes = np.array(
+                [
+                    text_size(font, str(text), markup=True)
+                    for text in axis_layout["_ticktext"]
+                ]
+            )
+            position = axis_layout["_position"]
+            side = axis_layout.get("side")
+            # Labels at the far side of the plot area can not push the margins
+            if position == (0 if side == "right" else 1):
+                continue
+            if axis.startswith("x"):
+                # Labels hang below the axis
+                label_height = sizes[:, 1].max()
+                pushmargins.append(
+                    dict(
+                        l=0,
+                        r=1,
+                        t=1 - position,
+                        b=1 - position + label_height / plot_height,
+                        y=position,
+                        yt=0,
+                        yb=label_height,
+                    )
+                )
+            elif side == "right":
+                right = axis_layout["_shift"] + sizes[:, 0].max()
+                pushmargins.append(
+                    dict(
+                        l=position,
+                        r=position + right / plot_width,
+                        t=0,
+                        b=1,
+                        x=position,
+                        xl=0,
+                        xr=right,
+                    )
+                )
+            else:
+                left = sizes[:, 0].max() - axis_layout["_shift"]
+                pushmargins.append(
+                    dict(
+                        l=position - left / plot_width,
+                        r=position,
+                        t=0,
+                        b=1,
+                        x=position,
+                        xl=left,
+                        xr=0,
+                    )
+                )
+        return pushmargins
+
+    def _create_pango_context(self) -> Pango.Context:
+        return PangoCairo.FontMap.get_default().create_context()
+
+    @staticmethod
+    def _detect_axis_type(data):
+        return detect_axis_type(data)
@@ -0,0 +1,294 @@
+"""This module provides a function for rendering a plotly
+:class:`plotly.graph_objects.Figure` to an image file without a display, and the
+``plotly-gtk-render`` command for rendering many figures in parallel.
+
+The same drawing code as :class:`plotly_gtk.chart.PlotlyGtk` is used, with a cairo
+surface in place of the widget. Parts of the figure which
+:class:`plotly_gtk.chart.PlotlyGtk` shows with GTK widgets, such as the legend,
+titles, annotations and update menus, are not rendered.
+"""
+
+import argparse
+import base64
+import concurrent.futures
+import functools
+import importlib.resources
+import io
+import json
+import os
+import pathlib
+import signal
+import sys
+import time
+from typing import IO, TYPE_CHECKING, Iterator
+
+import cairo
+import numpy as np
+
+from plotly_gtk._chart import _Chart
+from plotly_gtk._figure import prepare_figure
+from plotly_gtk.utils.text import update_context
+
+if TYPE_CHECKING:
+    from plotly import graph_objects as go
+
+FORMATS = ["png", "svg", "pdf"]
+
+# The size of a figure which does not set one, as in plotly.js
+_DEFAULT_WIDTH = 700
+_DEFAULT_HEIGHT = 450
+# Growing one margin can make labels on another axis overflow
+_AUTOMARGIN_PASSES = 4
+
+
+@functools.cache
+def _load_template(name: str) -> dict:
+    file = importlib.resources.files(anchor="plotly_gtk.utils") / "templates"
+    with open(file / f"{name}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _with_template(fig: dict) -> dict:
+    # Templates are loaded once per process. The figure is copied so that the
+    # caller's is not changed, and the template's layout because preparing a
+    # figure adds axes to it.
+    layout = fig.get("layout") or {}
+    template = layout.get("template", "plotly")
+    if isinstance(template, str):
+        template = _load_template(template)
+    return dict(
+        fig,
+        layout=dict(layout, template=dict(template, layout=dict(template["layout"]))),
+    )
+
+
+def render(
+    fig: "go.Figure | dict",
+    width: int | None = None,
+    height: int | None = None,
+    format: str = "png",  # pylint: disable=redefined-builtin
+    scale: float = 1,
+    file: "str | os.PathLike | IO[bytes] | None" = None,
+) -> bytes | None:
+    """Render a figure to an image.
+
+    The margins are grown to fit the tick labels, as they are by
+    :class:`plotly_gtk.chart.PlotlyGtk`. The template of a figure given as a
+    dictionary may be a name, and defaults to plotly's.
+
+    Parameters
+    ----------
+    fig: go.Figure | dict
+        The figure to render
+    width: int | None
+        The width of the image in pixels, or points for vector formats, or None to
+        use the figure's width
+    height: int | None
+        The height of the image in pixels, or points for vector formats, or None
+        to use the figure's height
+    format: str
+        One of "png", "svg" or "pdf"
+    scale: float
+        The number of image pixels per pixel of the figure, for png images
+    file: str | os.PathLike | IO[bytes] | None
+        The file to write the image to, or None to return it
+
+    Returns
+    -------
+    bytes | None
+        The image, if `file` is None
+
+    Raises
+    ------
+    ValueError
+        If `format` is not supported
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported format {format}, expected one of {FORMATS}")
+    if isinstance(fig, dict):
+        fig = _with_template(fig)
+    figure = prepare_figure(fig)
+    layout = figure.layout
+    width = width or layout.get("width") or _DEFAULT_WIDTH
+    height = height or layout.get("height") or _DEFAULT_HEIGHT
+
+    output = io.BytesIO() if file is None else file
+    if isinstance(output, os.PathLike):
+        output = os.fspath(output)
+    if format == "png":
+        surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32, round(width * scale), round(height * scale)
+        )
+        surface.set_device_scale(scale, scale)
+    elif format == "svg":
+        surface = cairo.SVGSurface(output, width, height)
+    else:
+        surface = cairo.PDFSurface(output, width, height)
+
+    context = cairo.Context(surface)
+    update_context(context)
+    for _ in range(_AUTOMARGIN_PASSES):
+        # pylint: disable=protected-access
+        pushmargins = figure._tick_label_pushmargins(width, height)
+        if not figure._push_margins(pushmargins, width, height):
+            break
+    _Chart(figure.fig).draw(context, width, height, cache=False)
+    if format == "png":
+        surface.write_to_png(output)
+    surface.finish()
+
+    if file is None:
+        return output.getvalue()
+    return None
+
+
+def _decode_typed_array(obj: dict) -> "dict | np.ndarray":
+    # plotly.py writes numpy arrays in JSON as base64 encoded buffers
+    if "bdata" in obj and "dtype" in obj:
+        array = np.frombuffer(base64.b64decode(obj["bdata"]), dtype=obj["dtype"])
+        if "shape" in obj:
+            array = array.reshape([int(n) for n in str(obj["shape"]).split(",")])
+        return array
+    return obj
+
+
+def _on_timeout(signum, frame):  # pylint: disable=unused-argument
+    raise TimeoutError
+
+
+def _init_worker():
+    # Load the default template and the fonts before the first figure
+    render({"data": [{"type": "scatter", "x": [0, 1], "y": [0, 1]}]})
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _on_timeout)
+
+
+def _render_job(
+    source: "str | os.PathLike", output: str, options: dict, timeout: float
+) -> tuple[str, str, float]:
+    start = time.perf_counter()
+    if timeout and hasattr(signal, "SIGALRM"):
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    # The timer is stopped before the handlers run, and an alarm which goes off
+    # while stopping it is caught by them
+    try:
+        try:
+            if isinstance(source, str):
+                fig = json.loads(source, object_hook=_decode_typed_array)
+            else:
+                with open(source, encoding="utf-8") as f:
+                    fig = json.load(f, object_hook=_decode_typed_array)
+            render(fig, file=output, **options)
+        finally:
+            if hasattr(signal, "SIGALRM"):
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        status = "ok"
+    except TimeoutError:
+        status = "timeout"
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        status = f"error: {type(e).__name__}: {e}"
+    return output, status, time.perf_counter() - start
+
+
+def _jobs(
+    source: str,
+    output_dir: pathlib.Path,
+    format: str,  # pylint: disable=redefined-builtin
+) -> Iterator[tuple["str | pathlib.Path", str]]:
+    if os.path.isdir(source):
+        for path in sorted(pathlib.Path(source).glob("*.json")):
+            yield path, str(output_dir / f"{path.stem}.{format}")
+        return
+    with open(0 if source == "-" else source, encoding="utf-8") as f:
+        for number, line in enumerate(f):
+            if line.strip():
+                yield line, str(output_dir / f"{number:06d}.{format}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Render figures to image files in parallel.
+
+    This is the ``plotly-gtk-render`` command. Figures are read from the JSON
+    files in a directory, or from a JSON lines file, with one figure per line.
+
+    Parameters
+    ----------
+    argv: list[str] | None
+        The command line arguments, or None to use :data:`sys.argv`
+
+    Returns
+    -------
+    int
+        The exit status, which is 1 if any figure failed to render
+    """
+    parser = argparse.ArgumentParser(
+        prog="plotly-gtk-render",
+        description="Render plotly figures to image files without a display.",
+    )
+    parser.add_argument(
+        "source",
+        help="a directory of .json figures, or a JSON lines file, or - for stdin",
+    )
+    parser.add_argument("-o", "--output-dir", default=".", type=pathlib.Path)
+    parser.add_argument("-f", "--format", default="png", choices=FORMATS)
+    parser.add_argument("--width", type=int)
+    parser.add_argument("--height", type=int)
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60,
+        help="seconds allowed for each figure, or 0 for no limit",
+    )
+    args = parser.parse_args(argv)
+    args.jobs = args.jobs or 1
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    options = dict(
+        width=args.width, height=args.height, format=args.format, scale=args.scale
+    )
+    counts = {"ok": 0, "timeout": 0, "error": 0}
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(
+        args.jobs, initializer=_init_worker
+    ) as executor:
+        # Only a few figures per worker are read ahead, so that a large stream
+        # is not held in memory
+        pending = set()
+        outputs = {}
+        jobs = _jobs(args.source, args.output_dir, args.format)
+        while True:
+            for source, output in jobs:
+                future = executor.submit(
+                    _render_job, source, output, options, args.timeout
+                )
+                pending.add(future)
+                outputs[future] = output
+                if len(pending) >= 4 * args.jobs:
+                    break
+            if not pending:
+                break
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                output = outputs.pop(future)
+                try:
+                    _, status, _ = future.result()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    status = f"error: {type(e).__name__}: {e}"
+                counts[status.split(":")[0]] += 1
+                if status != "ok":
+                    print(f"{output}: {status}", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    print(
+        f"Rendered {counts["ok"]} of {total} figures in {elapsed:.1f} s "
+        f"({total / elapsed if elapsed else 0:.1f} figures/s, {args.jobs} workers)"
+        f", {counts["timeout"]} timed out, {counts["error"]} failed"
+    )
+    return 1 if counts["ok"] < total else 0
@@ -2,8 +2,10 @@
 :class:`plotly_gtk.chart.PlotlyGtk`."""
 
 import collections
+import functools
 import importlib
 import json
+import types
 import typing
 
 import gi
@@ -22,6 +24,26 @@ from gi.repository import (  # pylint: disable=wrong-import-position, wrong-impo
 )
 
 
+class LazyModule(types.ModuleType):
+    """A proxy for a module which is only imported when one of its attributes is
+    first accessed.
+
+    This keeps optional or heavy dependencies such as :mod:`pandas` and
+    :mod:`plotly` out of the import path of :mod:`plotly_gtk` until they are
+    actually used.
+
+    Parameters
+    ----------
+    name: str
+        The absolute name of the module to import
+    """
+
+    def __getattr__(self, attr: str) -> object:
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
 def update_dict(d: "GenericType", u: "GenericType") -> "GenericType":
     """Return a copy of :class:`dict` `d` recursively updated with values from
     :class:`dict` `u`.
@@ -47,9 +69,62 @@ def update_dict(d: "GenericType", u: "GenericType") -> "GenericType":
     return d
 
 
+class _Identity:
+    """Hold an unhashable value, comparing equal only to a holder of the same
+    object. The value is kept alive, so its identity can not be reused by another
+    object while the holder exists."""
+
+    __slots__ = ["value"]
+
+    def __init__(self, value: object):
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Identity) and other.value is self.value
+
+    def __hash__(self) -> int:
+        return id(self.value)
+
+
+def freeze(value: object, private: "typing.Collection[str]" = ()) -> typing.Hashable:
+    """Convert part of a figure to a hashable value, which compares equal to the
+    result of a later call as long as the figure has not changed.
+
+    Parameters
+    ----------
+    value: object
+        A dictionary, or any value in one
+    private: typing.Collection[str]
+        The keys starting with an underscore to include, all others are skipped
+
+    Returns
+    -------
+    typing.Hashable
+        Nested tuples of the values. Numpy arrays and other unhashable objects are
+        represented by their identity, and kept alive by the result, so they must
+        not be modified in place.
+    """
+    if isinstance(value, collections.abc.Mapping):
+        return tuple(
+            sorted(
+                (key, freeze(item, private))
+                for key, item in value.items()
+                if not str(key).startswith("_") or key in private
+            )
+        )
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item, private) for item in value)
+    if isinstance(value, collections.abc.Hashable):
+        return value
+    return _Identity(value)
+
+
+@functools.lru_cache(maxsize=1024)
 def parse_color(color: str) -> tuple[float, float, float]:
     """Return the RGB components of a color provided as a string.
 
+    Results are cached, as colors are parsed for every trace and axis on each draw.
+
     Parameters
     ----------
     color: str
@@ -70,6 +145,23 @@ def parse_color(color: str) -> tuple[float, float, float]:
     raise ValueError
 
 
+@functools.lru_cache(maxsize=64)
+def parse_colorway(colorway: tuple[str, ...]) -> tuple[tuple[float, float, float], ...]:
+    """Return the RGB components of each color of a colorway.
+
+    Parameters
+    ----------
+    colorway: tuple[str, ...]
+        The colors, e.g. from a template's layout
+
+    Returns
+    -------
+    tuple[tuple[float, float, float], ...]
+        The red, green, and blue components of each color
+    """
+    return tuple(parse_color(color) for color in colorway)
+
+
 def parse_font(
     font: dict[str, str | int], single_family: bool = False
 ) -> Pango.FontDescription:
@@ -91,6 +183,11 @@ def parse_font(
         The fields are set as provided in the input :class:`dict`.
     """
     font = f"{font["family"]} {font["style"]} {font["variant"]} {font["weight"]} {font["size"]}px"
+    return _parse_font_string(font, single_family).copy()
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_font_string(font: str, single_family: bool) -> Pango.FontDescription:
     font_desc = Pango.FontDescription.from_string(font)
     if single_family:
         font_desc = (
@@ -0,0 +1,590 @@
+"""This module provides functions for converting trace data into the numeric
+arrays used by :class:`plotly_gtk.chart.PlotlyGtk`."""
+
+import datetime
+import numbers
+import re
+import warnings
+import weakref
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from plotly_gtk.utils import LazyModule
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = LazyModule("pandas")
+
+_SAMPLE_SIZE = 1000
+_DATE_PATTERN = re.compile(
+    r"^\s*-?\d{4,}(-\d{1,2}(-\d{1,2}([ T]\d{1,2}(:\d{2}(:\d{2}(\.\d*)?)?)?)?)?)?"
+    r"(Z|[+-]\d{2}:?\d{2})?\s*$"
+)
+_axis_types: dict[int, tuple[weakref.ref, str]] = {}
+# The number of versions for which TraceData remembers the length of its data
+_APPEND_HISTORY = 64
+
+
+class RingBuffer:
+    """An array which values can be appended to, optionally keeping only the most
+    recent values.
+
+    The values are stored in an array of twice the capacity, so that they can
+    always be viewed as a single contiguous array. When the end of the storage is
+    reached the values are moved back to the start, so appending costs amortized
+    constant time per value.
+
+    Parameters
+    ----------
+    values: np.ndarray | list
+        The initial values
+    capacity: int | None
+        The maximum number of values to keep, or None to keep all of them
+    dtype: np.typing.DTypeLike
+        The type of the values
+    """
+
+    def __init__(
+        self,
+        values: "np.ndarray | list",
+        capacity: int | None = None,
+        dtype: "np.typing.DTypeLike" = np.float64,
+    ):
+        values = np.asarray(values, dtype=dtype).ravel()
+        if capacity is not None:
+            values = values[len(values) - min(capacity, len(values)) :]
+        self.capacity = capacity
+        self._storage = np.empty(max(2 * (capacity or len(values)), 16), dtype=dtype)
+        self._storage[: len(values)] = values
+        self._start = 0
+        self._stop = len(values)
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    @property
+    def values(self) -> np.ndarray:
+        """A view of the values, which is invalidated by :meth:`extend`."""
+        return self._storage[self._start : self._stop]
+
+    def extend(self, values: "np.ndarray | list") -> np.ndarray:
+        """Append values, dropping the oldest values if the capacity is exceeded.
+
+        Parameters
+        ----------
+        values: np.ndarray | list
+            The values to append
+
+        Returns
+        -------
+        np.ndarray
+            A copy of the values which were dropped
+        """
+        values = np.asarray(values, dtype=self._storage.dtype).ravel()
+        if self.capacity is not None:
+            values = values[len(values) - min(self.capacity, len(values)) :]
+            n_dropped = max(len(self) + len(values) - self.capacity, 0)
+        else:
+            n_dropped = 0
+        dropped = self._storage[self._start : self._start + n_dropped].copy()
+        self._start += n_dropped
+
+        if self._stop + len(values) > len(self._storage):
+            length = len(self)
+            if length + len(values) > len(self._storage) // 2:
+                storage = np.empty(
+                    2 * (length + len(values)), dtype=self._storage.dtype
+                )
+            else:
+                storage = self._storage
+            storage[:length] = self._storage[self._start : self._stop]
+            self._storage = storage
+            self._start, self._stop = 0, length
+        self._storage[self._stop : self._stop + len(values)] = values
+        self._stop += len(values)
+        return dropped
+
+
+class TraceData:
+    """Columnar storage for the numeric data of a trace.
+
+    Each column is held as a contiguous float64 array so that it can be used by
+    the range calculation and the renderers without further conversion. Values
+    derived from the columns, such as finite masks, log10 copies and extents,
+    are computed on first use and cached until the column is replaced with
+    :meth:`set`.
+
+    Columns which cannot be converted to floats (e.g. categories) are stored
+    unchanged as arrays.
+    """
+
+    __slots__ = ("x", "y", "size", "color", "version", "_cache", "_buffers", "_lengths")
+
+    columns = ("x", "y", "size", "color")
+
+    def __init__(self) -> None:
+        self.x: np.ndarray | None = None
+        self.y: np.ndarray | None = None
+        self.size: np.ndarray | None = None
+        self.color: np.ndarray | None = None
+        self.version = 0
+        self._cache: dict[tuple, np.ndarray | tuple[float, float] | bool] = {}
+        # The buffers of extended columns, and of arrays derived from them
+        self._buffers: dict[str | tuple, RingBuffer] = {}
+        self._lengths: dict[int, int] = {}
+
+    def set(self, column: str, values: "np.ndarray | list | None") -> np.ndarray | None:
+        """Replace a column.
+
+        Parameters
+        ----------
+        column: str
+            One of "x", "y", "size", or "color"
+        values: np.ndarray | list | None
+            The new values, or None to clear the column
+
+        Returns
+        -------
+        np.ndarray | None
+            The stored array, which should replace `values` in the trace so that
+            :meth:`is_current` can tell whether the trace has changed
+        """
+        if values is not None:
+            try:
+                values = np.ascontiguousarray(values, dtype=np.float64)
+            except (ValueError, TypeError):
+                values = np.asarray(values)
+        setattr(self, column, values)
+        self.version += 1
+        self._cache.clear()
+        self._buffers = {
+            key: buffer
+            for key, buffer in self._buffers.items()
+            if isinstance(key, str) and key != column
+        }
+        self._lengths.clear()
+        return values
+
+    def extend(
+        self, columns: "dict[str, np.ndarray | list]", max_points: int | None = None
+    ) -> None:
+        """Append values to columns, as plotly.js's extendTraces does.
+
+        The extents, sortedness, log10 copies and finite masks of the columns are
+        updated from the new values rather than recomputed, unless values which
+        were dropped could have been the minimum or maximum.
+
+        Parameters
+        ----------
+        columns: dict[str, np.ndarray | list]
+            The values to append to each column, e.g. {"x": [...], "y": [...]}
+        max_points: int | None
+            The number of most recent values to keep, or None to keep all of them
+
+        Raises
+        ------
+        ValueError
+            If the columns which hold values are not all extended by the same
+            number of values, or if any of them are not numeric
+        """
+        filled = {
+            column for column in self.columns if getattr(self, column) is not None
+        }
+        if filled and set(columns) != filled:
+            raise ValueError(
+                f"Columns {sorted(columns)} were given, but all of {sorted(filled)} "
+                "must be extended"
+            )
+        for column in filled:
+            if getattr(self, column).dtype.kind != "f":
+                raise ValueError(f"Values can not be appended to non-numeric {column}")
+        new = {
+            column: np.asarray(values, dtype=np.float64).ravel()
+            for column, values in columns.items()
+        }
+        if len({len(values) for values in new.values()}) > 1:
+            raise ValueError(
+                "All columns must be extended by the same number of values"
+            )
+
+        length = len(self.x) if self.x is not None else 0
+        dropped_any = False
+        kept = {}
+        derived = {}
+        for key in self._cache:
+            if key[0] == "log10":
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    derived[key] = np.log10(new[key[1]])
+            elif key[0] == "finite":
+                derived[key] = np.isfinite(
+                    self._axis_values(new["x"], key[1])
+                ) & np.isfinite(self._axis_values(new["y"], key[2]))
+            elif key[0] == "sorted" and self._cache[key]:
+                column, log = key[1:]
+                values = self._axis_values(new[column], log)
+                previous = self._axis_values(getattr(self, column)[-1:], log)
+                kept[key] = bool(
+                    not np.isnan(values).any()
+                    and np.all(values[1:] >= values[:-1])
+                    and np.all(values[:1] >= previous)
+                )
+
+        for column, values in new.items():
+            buffer = self._buffers.get(column)
+            current = getattr(self, column)
+            if current is None:
+                current = np.empty(0)
+            truncated = max_points is not None and len(current) > max_points
+            if buffer is None or buffer.capacity != max_points:
+                buffer = RingBuffer(current, max_points)
+                self._buffers[column] = buffer
+            dropped = buffer.extend(values)
+            truncated = truncated or len(values) > len(buffer)
+            dropped_any = dropped_any or truncated or len(dropped) > 0
+            setattr(self, column, buffer.values)
+
+            extent = self._cache.get(("extent", column))
+            low, high = _finite_extent(dropped) if len(dropped) else (np.nan, np.nan)
+            if (
+                extent is not None
+                and not truncated
+                and not (low <= extent[0] or high >= extent[-1])
+            ):
+                new_low, new_high = _finite_extent(values)
+                kept[("extent", column)] = (
+                    np.fmin(extent[0], new_low),
+                    np.fmax(extent[-1], new_high),
+                )
+
+        # The derived arrays are kept in buffers like the columns, so that they
+        # are extended and truncated in the same way
+        buffers = {}
+        for key, values in derived.items():
+            buffer = self._buffers.get(key)
+            if buffer is None or buffer.capacity != max_points:
+                cached = self._cache[key]
+                buffer = RingBuffer(cached, max_points, dtype=cached.dtype)
+            buffer.extend(values)
+            buffers[key] = buffer
+            kept[key] = buffer.values
+        self._buffers = {
+            key: buffer for key, buffer in self._buffers.items() if isinstance(key, str)
+        }
+        self._buffers.update(buffers)
+
+        if dropped_any:
+            self._lengths.clear()
+        else:
+            self._lengths[self.version] = length
+            while len(self._lengths) > _APPEND_HISTORY:
+                del self._lengths[next(iter(self._lengths))]
+        self.version += 1
+        self._cache = kept
+
+    @staticmethod
+    def _axis_values(values: np.ndarray, log: bool) -> np.ndarray:
+        if not log:
+            return values
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.log10(values)
+
+    def appended_since(self, version: int) -> int | None:
+        """Find how many points have been appended since an earlier version.
+
+        Parameters
+        ----------
+        version: int
+            An earlier value of :attr:`version`
+
+        Returns
+        -------
+        int | None
+            The number of points appended with :meth:`extend`, or None if the data
+            has changed in any other way since `version`
+        """
+        if version == self.version:
+            return 0
+        if version not in self._lengths or self.x is None:
+            return None
+        return len(self.x) - self._lengths[version]
+
+    def is_current(self, column: str, values: "np.ndarray | list | None") -> bool:
+        """Check if a column holds `values`.
+
+        Parameters
+        ----------
+        column: str
+            One of "x", "y", "size", or "color"
+        values: np.ndarray | list | None
+            The values currently in the trace
+
+        Returns
+        -------
+        bool
+            True if `values` is the array stored in this column
+        """
+        return getattr(self, column) is values
+
+    def log10(self, column: str) -> np.ndarray:
+        """Get the log10 of a column, with NaN for non-positive values.
+
+        Parameters
+        ----------
+        column: str
+            One of "x", "y", "size", or "color"
+
+        Returns
+        -------
+        np.ndarray
+            The log10 of the column
+        """
+        key = ("log10", column)
+        if key not in self._cache:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self._cache[key] = np.log10(getattr(self, column))
+        return self._cache[key]
+
+    def values(self, column: str, log: bool = False) -> np.ndarray:
+        """Get a column in axis units.
+
+        Parameters
+        ----------
+        column: str
+            One of "x", "y", "size", or "color"
+        log: bool
+            If the column is plotted on a log axis
+
+        Returns
+        -------
+        np.ndarray
+            The column, or its log10 if `log` is True
+        """
+        return self.log10(column) if log else getattr(self, column)
+
+    def is_sorted(self, column: str, log: bool = False) -> bool:
+        """Check if a column in axis units is in ascending order without NaNs, so
+        that the visible part of it can be found with a binary search.
+
+        Parameters
+        ----------
+        column: str
+            One of "x", "y", "size", or "color"
+        log: bool
+            If the column is plotted on a log axis
+
+        Returns
+        -------
+        bool
+            True if the column is sorted
+        """
+        key = ("sorted", column, log)
+        if key not in self._cache:
+            values = self.values(column, log)
+            self._cache[key] = bool(
+                values is not None
+                and values.dtype.kind == "f"
+                and not np.isnan(values).any()
+                and np.all(values[1:] >= values[:-1])
+            )
+        return self._cache[key]
+
+    def finite(self, log_x: bool = False, log_y: bool = False) -> np.ndarray:
+        """Get a mask of the points with finite x and y values in axis units.
+
+        Parameters
+        ----------
+        log_x: bool
+            If x is plotted on a log axis
+        log_y: bool
+            If y is plotted on a log axis
+
+        Returns
+        -------
+        np.ndarray
+            A boolean mask
+        """
+        key = ("finite", log_x, log_y)
+        if key not in self._cache:
+            self._cache[key] = np.isfinite(self.values("x", log_x)) & np.isfinite(
+                self.values("y", log_y)
+            )
+        return self._cache[key]
+
+    def extent(self, column: str) -> tuple[float, float]:
+        """Get the minimum and maximum finite values of a column.
+
+        Parameters
+        ----------
+        column: str
+            One of "x", "y", "size", or "color"
+
+        Returns
+        -------
+        tuple[float, float]
+            The minimum and maximum, or NaNs if there are no finite values
+        """
+        key = ("extent", column)
+        if key not in self._cache:
+            values = getattr(self, column)
+            if values is None or values.dtype.kind != "f":
+                self._cache[key] = (np.nan, np.nan)
+            else:
+                self._cache[key] = _finite_extent(values)
+        return self._cache[key]
+
+
+def _finite_extent(values: np.ndarray) -> tuple[float, float]:
+    values = values[np.isfinite(values)]
+    return (values.min(), values.max()) if values.size else (np.nan, np.nan)
+
+
+def to_timestamps(values: "np.ndarray | list") -> np.ndarray:
+    """Convert dates to seconds since the epoch without visiting each value in
+    Python.
+
+    Naive dates are treated as UTC, timezone aware dates are converted to UTC.
+    Numbers are interpreted as milliseconds since the epoch, as in plotly.js.
+    Values which cannot be parsed become NaN.
+
+    Parameters
+    ----------
+    values: np.ndarray | list
+        Dates as :class:`numpy.datetime64`, ISO 8601 strings,
+        :class:`datetime.datetime` or :class:`pandas.Timestamp` objects, or any
+        array-like of these such as a :class:`pandas.Series`
+
+    Returns
+    -------
+    np.ndarray
+        A float64 array of seconds since 1970-01-01T00:00:00Z
+    """
+    if not hasattr(values, "dtype"):
+        values = np.asarray(values)
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biuf":
+        return np.asarray(values, dtype=np.float64) / 1e3
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            dates = np.asarray(values, dtype="datetime64[us]")
+    except (ValueError, TypeError, OverflowError, DeprecationWarning):
+        values = np.asarray(values).ravel()
+        # Without a format pandas infers one from the first value, so e.g. dates
+        # without a time would make all datetimes NaT
+        dates = np.asarray(
+            pd.to_datetime(values, utc=True, errors="coerce", format="ISO8601"),
+            dtype="datetime64[us]",
+        )
+        missing = np.isnat(dates)
+        if missing.any():
+            dates[missing] = np.asarray(
+                pd.to_datetime(
+                    values[missing], utc=True, errors="coerce", format="mixed"
+                ),
+                dtype="datetime64[us]",
+            )
+    timestamps = dates.view(np.int64) / 1e6
+    timestamps[np.isnat(dates)] = np.nan
+    return timestamps
+
+
+def detect_axis_type(data: "np.ndarray | list") -> str:
+    """Detect the plotly axis type for some data.
+
+    Numeric, datetime64 and categorical data are recognised from their dtype
+    without looking at the values. Other data is classified from a sample of at
+    most 1000 values. Results are cached for as long as the array is alive, so
+    data must not be modified in place between calls.
+
+    Parameters
+    ----------
+    data: np.ndarray | list
+        The data to be plotted on the axis
+
+    Returns
+    -------
+    str
+        One of "linear", "date", "category", or "multicategory"
+    """
+    key = id(data)
+    if key in _axis_types:
+        ref, axis_type = _axis_types[key]
+        if ref() is data:
+            return axis_type
+    axis_type = _detect_axis_type(data)
+    try:
+        ref = weakref.ref(data, lambda _: _axis_types.pop(key, None))
+    except TypeError:
+        return axis_type
+    _axis_types[key] = (ref, axis_type)
+    return axis_type
+
+
+def _detect_axis_type(data: "np.ndarray | list") -> str:
+    dtype = getattr(data, "dtype", None)
+    if dtype is not None:
+        if str(dtype) == "category":
+            return "category"
+        if getattr(data, "ndim", 1) > 1:
+            return "multicategory"
+        if dtype.kind == "M":
+            return "date"
+        if dtype.kind in "biufcm":
+            return "linear"
+    if not isinstance(data, (list, tuple)):
+        data = np.asarray(data)
+
+    length = len(data)
+    if length > _SAMPLE_SIZE:
+        index = np.linspace(0, length - 1, _SAMPLE_SIZE).astype(np.intp)
+        sample = (
+            data[index] if isinstance(data, np.ndarray) else [data[i] for i in index]
+        )
+    else:
+        sample = data
+    if isinstance(sample, np.ndarray) and sample.dtype.kind in "US":
+        return _classify_strings(np.unique(sample))
+
+    values = set()
+    for value in sample:
+        if isinstance(value, (list, tuple, np.ndarray)):
+            return "multicategory"
+        values.add(value)
+    return _classify_objects(values)
+
+
+def _classify_strings(values: np.ndarray) -> str:
+    dates = np.count_nonzero(
+        np.fromiter((_DATE_PATTERN.match(v) is not None for v in values), bool)
+    )
+    return _choose_axis_type({"date": dates, "category": len(values) - dates})
+
+
+def _classify_objects(values: set) -> str:
+    counts = {"date": 0, "linear": 0, "category": 0}
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, (np.datetime64, datetime.date)):
+            counts["date"] += 1
+        elif isinstance(value, numbers.Number):
+            counts["linear"] += 1
+        elif isinstance(value, str) and _DATE_PATTERN.match(value):
+            counts["date"] += 1
+        else:
+            counts["category"] += 1
+    return _choose_axis_type(counts)
+
+
+def _choose_axis_type(counts: dict[str, int]) -> str:
+    date = counts.get("date", 0)
+    linear = counts.get("linear", 0)
+    category = counts.get("category", 0)
+    if linear == 0 and date + category > 0:
+        return "date" if date > category else "category"
+    if date > 2 * linear:
+        return "date"
+    if category > 2 * linear:
+        return "category"
+    return "linear"
@@ -0,0 +1,425 @@
+"""This module provides vectorized functions for preparing the geometry drawn by
+:class:`plotly_gtk._chart._PlotlyGtk`."""
+
+import numpy as np
+
+
+def decimate(x_pos: np.ndarray, y_pos: np.ndarray, resolution: float = 1) -> np.ndarray:
+    """Reduce a polyline to at most four points per pixel column.
+
+    Consecutive points falling in the same column are replaced by the first, the
+    lowest, the highest, and the last of them, in their original order. A line
+    through the remaining points covers the same pixels as a line through all of
+    them. Points which are not finite are kept so that gaps in the line are
+    preserved.
+
+    Parameters
+    ----------
+    x_pos: np.ndarray
+        The horizontal positions of the points in pixels
+    y_pos: np.ndarray
+        The vertical positions of the points in pixels
+    resolution: float
+        The width of a pixel column, e.g. 0.5 on a surface with a scale factor of 2
+
+    Returns
+    -------
+    np.ndarray
+        The sorted indices of the points to keep
+    """
+    length = len(x_pos)
+    if length == 0:
+        return np.arange(0)
+    finite = np.isfinite(x_pos) & np.isfinite(y_pos)
+    column = np.where(finite, np.floor(x_pos / resolution), np.nan)
+
+    # A new group starts whenever the column changes. NaN never compares equal so
+    # every non-finite point forms a group of its own.
+    starts = np.empty(length, dtype=bool)
+    starts[0] = True
+    np.not_equal(column[1:], column[:-1], out=starts[1:])
+    group = np.cumsum(starts) - 1
+    first = np.flatnonzero(starts)
+    last = np.append(first[1:], length) - 1
+
+    y_low = np.where(finite, y_pos, np.inf)
+    y_high = np.where(finite, y_pos, -np.inf)
+    lowest = _first_in_group(y_low == np.minimum.reduceat(y_low, first)[group], group)
+    highest = _first_in_group(
+        y_high == np.maximum.reduceat(y_high, first)[group], group
+    )
+    return np.unique(np.concatenate((first, last, lowest, highest)))
+
+
+def _first_in_group(mask: np.ndarray, group: np.ndarray) -> np.ndarray:
+    index = np.flatnonzero(mask)
+    _, first = np.unique(group[index], return_index=True)
+    return index[first]
+
+
+def visible_slice(
+    values: np.ndarray, lower: float, upper: float, padding: int = 1
+) -> slice:
+    """Find the part of sorted data which lies within a range.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        Data sorted in ascending order, without NaNs
+    lower: float
+        The lower end of the visible range
+    upper: float
+        The upper end of the visible range
+    padding: int
+        The number of points to include on either side of the range, so that
+        lines leaving the visible range are still drawn
+
+    Returns
+    -------
+    slice
+        The slice of `values` to draw
+    """
+    start = np.searchsorted(values, lower, side="left") - padding
+    stop = np.searchsorted(values, upper, side="right") + padding
+    return slice(max(start, 0), min(stop, len(values)))
+
+
+def in_bounds(
+    x_pos: np.ndarray,
+    y_pos: np.ndarray,
+    bounds: tuple[float, float, float, float],
+    margin: "float | np.ndarray" = 0,
+) -> np.ndarray:
+    """Find the points which are within a rectangle.
+
+    Parameters
+    ----------
+    x_pos: np.ndarray
+        The horizontal positions of the points in pixels
+    y_pos: np.ndarray
+        The vertical positions of the points in pixels
+    bounds: tuple[float, float, float, float]
+        The left, right, top, and bottom of the rectangle in pixels
+    margin: float | np.ndarray
+        The distance outside the rectangle a point may be and still be drawn, e.g.
+        the marker radius
+
+    Returns
+    -------
+    np.ndarray
+        A boolean mask, which is False for points which are not finite
+    """
+    left, right, top, bottom = bounds
+    return (
+        (x_pos + margin >= left)
+        & (x_pos - margin <= right)
+        & (y_pos + margin >= top)
+        & (y_pos - margin <= bottom)
+    )
+
+
+def _regular_polygon(sides: int, radius: float = 1, start: float = 0) -> np.ndarray:
+    angles = start - np.pi / 2 + np.arange(sides) * 2 * np.pi / sides
+    return radius * np.column_stack((np.cos(angles), np.sin(angles)))
+
+
+def _star(points: int, outer: float, inner: float) -> np.ndarray:
+    vertices = _regular_polygon(2 * points, outer)
+    vertices[1::2] *= inner / outer
+    return vertices
+
+
+_CROSS = np.array(
+    [
+        [1.2, 0.4],
+        [1.2, -0.4],
+        [0.4, -0.4],
+        [0.4, -1.2],
+        [-0.4, -1.2],
+        [-0.4, -0.4],
+        [-1.2, -0.4],
+        [-1.2, 0.4],
+        [-0.4, 0.4],
+        [-0.4, 1.2],
+        [0.4, 1.2],
+        [0.4, 0.4],
+    ]
+)
+_ROTATE_45 = np.array([[1, -1], [1, 1]]) / np.sqrt(2)
+_TRIANGLE = 2 / np.sqrt(3)
+
+# Vertices of each marker symbol for a marker of radius 1, with y pointing down.
+# Circles are drawn as arcs.
+MARKER_SYMBOLS: dict[str, np.ndarray | None] = {
+    "circle": None,
+    "square": np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]),
+    "diamond": np.array([[-1.3, 0], [0, -1.3], [1.3, 0], [0, 1.3]]),
+    "cross": _CROSS,
+    "x": _CROSS @ _ROTATE_45,
+    "triangle-up": np.array([[-_TRIANGLE, 0.5], [_TRIANGLE, 0.5], [0, -1]]),
+    "triangle-down": np.array([[-_TRIANGLE, -0.5], [_TRIANGLE, -0.5], [0, 1]]),
+    "triangle-left": np.array([[0.5, -_TRIANGLE], [0.5, _TRIANGLE], [-1, 0]]),
+    "triangle-right": np.array([[-0.5, -_TRIANGLE], [-0.5, _TRIANGLE], [1, 0]]),
+    "pentagon": _regular_polygon(5, 1.05),
+    "hexagon": _regular_polygon(6, 1.05),
+    "octagon": _regular_polygon(8, 1.05, np.pi / 8),
+    "star": _star(5, 1.3, 0.55),
+    "hourglass": np.array([[1, 1], [-1, 1], [1, -1], [-1, -1]]),
+    "bowtie": np.array([[1, 1], [1, -1], [-1, 1], [-1, -1]]),
+    "line-ew": np.array([[-1.4, 0], [1.4, 0]]),
+    "line-ns": np.array([[0, -1.4], [0, 1.4]]),
+}
+
+# Plotly's numeric symbol codes for the implemented symbols. Adding 100 gives the
+# open variant, 200 the dot variant, and 300 the open-dot variant.
+MARKER_CODES = {
+    0: "circle",
+    1: "square",
+    2: "diamond",
+    3: "cross",
+    4: "x",
+    5: "triangle-up",
+    6: "triangle-down",
+    7: "triangle-left",
+    8: "triangle-right",
+    13: "pentagon",
+    14: "hexagon",
+    16: "octagon",
+    17: "star",
+    25: "hourglass",
+    26: "bowtie",
+    41: "line-ew",
+    42: "line-ns",
+}
+
+
+def parse_symbol(symbol: "str | int") -> tuple[str, bool, bool]:
+    """Parse a plotly marker symbol.
+
+    Parameters
+    ----------
+    symbol: str | int
+        A symbol name, e.g. "triangle-up-open", or a numeric symbol code
+
+    Returns
+    -------
+    tuple[str, bool, bool]
+        The base symbol, and whether the open and dot variants are selected.
+        Unimplemented symbols are drawn as circles.
+    """
+    if isinstance(symbol, (int, float, np.number)) or str(symbol).isdigit():
+        code = int(symbol)
+        name = MARKER_CODES.get(code % 100, "circle")
+        variant = code // 100
+        return name, variant in [1, 3], variant in [2, 3]
+    name = str(symbol)
+    is_dot = name.endswith("-dot")
+    name = name.removesuffix("-dot")
+    is_open = name.endswith("-open")
+    name = name.removesuffix("-open")
+    if name not in MARKER_SYMBOLS:
+        name = "circle"
+    return name, is_open or name.startswith("line-"), is_dot
+
+
+def group_markers(
+    x_pos: np.ndarray,
+    y_pos: np.ndarray,
+    radius: np.ndarray,
+    symbol: "np.ndarray | str | int",
+    resolution: float = 1,
+) -> list[tuple[str, float, np.ndarray, np.ndarray]]:
+    """Group markers which are drawn identically, so that each group can be drawn
+    as a single path.
+
+    Radii and positions are rounded to a quarter of a pixel, and markers which
+    then coincide with another marker in their group are dropped.
+
+    Parameters
+    ----------
+    x_pos: np.ndarray
+        The horizontal positions of the markers in pixels
+    y_pos: np.ndarray
+        The vertical positions of the markers in pixels
+    radius: np.ndarray
+        The radii of the markers in pixels
+    symbol: np.ndarray | str | int
+        The symbol of each marker, or one symbol for all of them
+    resolution: float
+        The size of a pixel, e.g. 0.5 on a surface with a scale factor of 2
+
+    Returns
+    -------
+    list[tuple[str, float, np.ndarray, np.ndarray]]
+        The symbol, radius, and horizontal and vertical positions of each group
+    """
+    if len(x_pos) == 0:
+        return []
+    step = resolution / 4
+    if isinstance(symbol, np.ndarray):
+        symbols, symbol_index = np.unique(symbol.astype(str), return_inverse=True)
+    else:
+        symbols, symbol_index = np.array([str(symbol)]), 0
+    radii, radius_index = np.unique(
+        np.round(np.broadcast_to(radius, x_pos.shape) / step).astype(np.int64),
+        return_inverse=True,
+    )
+
+    # Pack the group and the rounded position of each marker into one integer so
+    # that a single sort finds both the groups and the duplicates.
+    x_key = np.round(x_pos / step).astype(np.int64)
+    y_key = np.round(y_pos / step).astype(np.int64)
+    x_min, y_min = x_key.min(), y_key.min()
+    x_span = x_key.max() - x_min + 1
+    y_span = y_key.max() - y_min + 1
+    group = np.ravel(symbol_index * len(radii) + radius_index)
+    keys = np.unique((group * x_span + x_key - x_min) * y_span + y_key - y_min)
+    group, position = np.divmod(keys, x_span * y_span)
+    x_key, y_key = np.divmod(position, y_span)
+
+    starts = np.flatnonzero(np.diff(group, prepend=-1))
+    stops = np.append(starts[1:], len(keys))
+    return [
+        (
+            symbols[group[start] // len(radii)],
+            radii[group[start] % len(radii)] * step,
+            (x_key[start:stop] + x_min) * step,
+            (y_key[start:stop] + y_min) * step,
+        )
+        for start, stop in zip(starts, stops)
+    ]
+
+
+def finite_segments(x_pos: np.ndarray, y_pos: np.ndarray) -> np.ndarray:
+    """Split a polyline into runs of finite points.
+
+    Parameters
+    ----------
+    x_pos: np.ndarray
+        The horizontal positions of the points in pixels
+    y_pos: np.ndarray
+        The vertical positions of the points in pixels
+
+    Returns
+    -------
+    np.ndarray
+        An array of shape (segments, 2) holding the start and stop index of each
+        run
+    """
+    finite = np.isfinite(x_pos) & np.isfinite(y_pos)
+    edges = np.flatnonzero(np.diff(finite, prepend=False, append=False))
+    return edges.reshape(-1, 2)
+
+
+def step_vertices(
+    x_pos: np.ndarray, y_pos: np.ndarray, shape: str
+) -> tuple[np.ndarray, np.ndarray]:
+    """Add the corners of a stepped line between each pair of points.
+
+    Parameters
+    ----------
+    x_pos: np.ndarray
+        The horizontal positions of the points in pixels
+    y_pos: np.ndarray
+        The vertical positions of the points in pixels
+    shape: str
+        One of plotly's line shapes "hv", "vh", "hvh", or "vhv". Other shapes
+        leave the points unchanged.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The horizontal and vertical positions of the vertices. Corners next to a
+        point which is not finite are not finite either, so gaps are preserved.
+    """
+    length = len(x_pos)
+    if length < 2 or shape not in ["hv", "vh", "hvh", "vhv"]:
+        return x_pos, y_pos
+    finite = np.isfinite(x_pos) & np.isfinite(y_pos)
+    gap = ~(finite[:-1] & finite[1:])
+    if shape in ["hv", "vh"]:
+        x_vertices = np.empty(2 * length - 1)
+        y_vertices = np.empty(2 * length - 1)
+        x_vertices[::2] = x_pos
+        y_vertices[::2] = y_pos
+        if shape == "hv":
+            x_vertices[1::2] = x_pos[1:]
+            y_vertices[1::2] = y_pos[:-1]
+        else:
+            x_vertices[1::2] = x_pos[:-1]
+            y_vertices[1::2] = y_pos[1:]
+        x_vertices[1::2][gap] = np.nan
+        return x_vertices, y_vertices
+
+    x_vertices = np.empty(3 * length - 2)
+    y_vertices = np.empty(3 * length - 2)
+    x_vertices[::3] = x_pos
+    y_vertices[::3] = y_pos
+    if shape == "hvh":
+        x_vertices[1::3] = x_vertices[2::3] = (x_pos[:-1] + x_pos[1:]) / 2
+        y_vertices[1::3] = y_pos[:-1]
+        y_vertices[2::3] = y_pos[1:]
+    else:
+        x_vertices[1::3] = x_pos[:-1]
+        x_vertices[2::3] = x_pos[1:]
+        y_vertices[1::3] = y_vertices[2::3] = (y_pos[:-1] + y_pos[1:]) / 2
+    x_vertices[1::3][gap] = x_vertices[2::3][gap] = np.nan
+    return x_vertices, y_vertices
+
+
+def spline_controls(
+    x_pos: np.ndarray, y_pos: np.ndarray, smoothing: float = 1
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Find the control points of a cardinal spline through some points.
+
+    Parameters
+    ----------
+    x_pos: np.ndarray
+        The horizontal positions of the points in pixels, all finite
+    y_pos: np.ndarray
+        The vertical positions of the points in pixels, all finite
+    smoothing: float
+        Plotly's line.smoothing, from 0 (straight lines) to 1.3
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        The horizontal and vertical positions of the first and then the second
+        control point of the cubic Bézier curve between each pair of points
+    """
+    points = np.column_stack((x_pos, y_pos))
+    padded = np.concatenate((points[:1], points, points[-1:]))
+    tangent = (padded[2:] - padded[:-2]) * smoothing / 6
+    first = points[:-1] + tangent[:-1]
+    second = points[1:] - tangent[1:]
+    return first[:, 0], first[:, 1], second[:, 0], second[:, 1]
+
+
+def bar_outline(
+    edges: np.ndarray, heights: np.ndarray, baseline: float = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the outline of a row of adjacent bars, e.g. the bins of a histogram.
+
+    Neighbouring bars of equal height, including empty bins, are merged so that
+    the outline has no collinear vertices.
+
+    Parameters
+    ----------
+    edges: np.ndarray
+        The positions of the edges of the bars, one more than the number of bars
+    heights: np.ndarray
+        The heights of the bars
+    baseline: float
+        The position the bars rise from
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The horizontal and vertical positions of the vertices of a polygon
+    """
+    if len(heights) == 0:
+        return np.empty(0), np.empty(0)
+    starts = np.append(True, heights[1:] != heights[:-1])
+    x_vertices = np.repeat(np.append(edges[:-1][starts], edges[-1]), 2)
+    y_vertices = np.concatenate(([baseline], np.repeat(heights[starts], 2), [baseline]))
+    return x_vertices, y_vertices
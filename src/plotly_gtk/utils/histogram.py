@@ -0,0 +1,437 @@
+"""This module provides functions for binning the samples of histogram traces
+without visiting each sample in Python."""
+
+import collections
+import copy
+import threading
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from plotly_gtk.utils import LazyModule, round_sf
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = LazyModule("pandas")
+
+_CACHE_SIZE = 32
+_MAX_BINS = 5000
+_cache: collections.OrderedDict[tuple, tuple[tuple, tuple, tuple]] = (
+    collections.OrderedDict()
+)
+# Figures are prepared in worker threads
+_lock = threading.Lock()
+
+
+def histogram(  # pylint: disable=too-many-arguments
+    x: np.ndarray,
+    y: np.ndarray | None = None,
+    nbins: int = 0,
+    start: float | None = None,
+    end: float | None = None,
+    size: float | None = None,
+    histfunc: str = "count",
+    histnorm: str = "",
+    cumulative: tuple[bool, str, str] = (False, "increasing", "include"),
+    date: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """Bin samples as plotly.js does for a histogram trace.
+
+    Parameters
+    ----------
+    x: np.ndarray
+        The samples. Arrays which are not floats are treated as categories.
+    y: np.ndarray | None
+        The values aggregated by `histfunc`, one per sample
+    nbins: int
+        The number of bins to aim for, or 0 to choose automatically
+    start: float | None
+        The position of the first bin edge
+    end: float | None
+        The position up to which samples are binned
+    size: float | None
+        The width of the bins, or None to choose a round width
+    histfunc: str
+        One of "count", "sum", "avg", "min", or "max"
+    histnorm: str
+        One of "", "percent", "probability", "density", or "probability density"
+    cumulative: tuple[bool, str, str]
+        Plotly's cumulative.enabled, cumulative.direction and cumulative.currentbin
+    date: bool
+        Whether the samples are timestamps
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray | None]
+        The bin edges, the value of each bin, and the categories if the samples
+        are categorical
+    """
+    if x.dtype.kind == "f":
+        accumulator = HistogramAccumulator.from_samples(
+            x, y, nbins, start, end, size, histfunc, date
+        )
+        return accumulator.edges, accumulator.values(histnorm, cumulative), None
+
+    codes, categories = pd.factorize(x.ravel())
+    keep = codes >= 0
+    accumulator = HistogramAccumulator(
+        -0.5,
+        1,
+        len(categories),
+        "count" if y is None else histfunc,
+        max_bins=max(len(categories), 1),
+    )
+    accumulator.add(codes[keep], None if y is None else y.ravel()[keep])
+    return accumulator.edges, accumulator.values(histnorm, cumulative), categories
+
+
+def cached_histogram(
+    sources: tuple, x: np.ndarray, y: np.ndarray | None = None, **spec
+) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """Bin samples with :func:`histogram`, reusing the result of an earlier call
+    with the same source data and bin specification.
+
+    Parameters
+    ----------
+    sources: tuple
+        The objects the samples were created from, e.g. the arrays given in the
+        figure. Numpy arrays are compared by identity and length, so they must not
+        be modified in place. The samples made from other objects, such as lists,
+        are compared with those of the earlier call.
+    x: np.ndarray
+        The samples, see :func:`histogram`
+    y: np.ndarray | None
+        The values aggregated by `histfunc`, see :func:`histogram`
+    **spec
+        The remaining arguments of :func:`histogram`
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray | None]
+        The bin edges, the value of each bin, and the categories if the samples
+        are categorical
+    """
+    key = (
+        tuple(
+            (id(source), len(source) if hasattr(source, "__len__") else None)
+            for source in sources
+        ),
+        tuple(sorted(spec.items())),
+    )
+    with _lock:
+        cached = _cache.get(key)
+    if (
+        cached is not None
+        and all(
+            cached_source is source for cached_source, source in zip(cached[0], sources)
+        )
+        and (
+            all(isinstance(source, np.ndarray) for source in sources)
+            or all(map(_same_samples, cached[1], (x, y)))
+        )
+    ):
+        with _lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+        return cached[2]
+    result = histogram(x, y, **spec)
+    with _lock:
+        _cache[key] = (sources, (x, y), result)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def _same_samples(a: np.ndarray | None, b: np.ndarray | None) -> bool:
+    if a is None or b is None:
+        return a is b
+    return a.shape == b.shape and np.array_equal(
+        a, b, equal_nan=a.dtype.kind == "f" and b.dtype.kind == "f"
+    )
+
+
+def _bin_size(span: float, nbins: int, n_samples: int) -> float:
+    if span == 0:
+        return 1
+    if not nbins:
+        return round_sf(span / np.sqrt(n_samples), 1)
+    # The smallest width of the form 1, 2 or 5 times a power of ten which gives at
+    # most nbins bins
+    raw = span / nbins
+    magnitude = 10 ** np.floor(np.log10(raw))
+    for step in [1, 2, 5, 10]:
+        if step * magnitude >= raw:
+            return step * magnitude
+    return 10 * magnitude
+
+
+def _shift_start(start: float, size: float, finite: np.ndarray, date: bool) -> float:
+    # As plotly.js, bins of integers are centred on them rather than starting at
+    # them, unless they are dates
+    if date or not len(finite) or np.any(finite != np.round(finite)):
+        return start
+    if size < 1:
+        return finite.min() - size / 2
+    start -= 0.5
+    return start + size if start + size < finite.min() else start
+
+
+class HistogramAccumulator:
+    """Aggregates of samples in uniform bins, which can be extended with further
+    samples at a cost proportional to the number of new samples.
+
+    When samples fall outside the bins, empty bins are added, and if that would
+    give more than `max_bins` bins neighbouring bins are merged.
+
+    Parameters
+    ----------
+    start: float
+        The position of the first bin edge
+    size: float
+        The width of the bins
+    n_bins: int
+        The initial number of bins
+    histfunc: str
+        One of "count", "sum", "avg", "min", or "max"
+    lower: float | None
+        Samples below this are ignored, or None to add bins for them
+    upper: float | None
+        Samples above this are ignored, or None to add bins for them
+    max_bins: int
+        The maximum number of bins
+    """
+
+    def __init__(
+        self,
+        start: float,
+        size: float,
+        n_bins: int,
+        histfunc: str = "count",
+        lower: float | None = None,
+        upper: float | None = None,
+        max_bins: int = _MAX_BINS,
+    ):  # pylint: disable=too-many-arguments
+        self.start = start
+        self.size = size
+        self.histfunc = histfunc
+        self.lower = lower
+        self.upper = upper
+        self.max_bins = max_bins
+        self.counts = np.zeros(n_bins)
+        self.aggregate = None
+        if histfunc in ["sum", "avg"]:
+            self.aggregate = np.zeros(n_bins)
+        elif histfunc in ["min", "max"]:
+            self.aggregate = np.full(n_bins, self._empty)
+
+    @classmethod
+    def from_samples(
+        cls,
+        x: np.ndarray,
+        y: np.ndarray | None = None,
+        nbins: int = 0,
+        start: float | None = None,
+        end: float | None = None,
+        size: float | None = None,
+        histfunc: str = "count",
+        date: bool = False,
+    ) -> "HistogramAccumulator":  # pylint: disable=too-many-arguments
+        """Bin samples, choosing the bins as plotly.js does.
+
+        Parameters
+        ----------
+        x: np.ndarray
+            The samples
+        y: np.ndarray | None
+            The values aggregated by `histfunc`, one per sample
+        nbins: int
+            The number of bins to aim for, or 0 to choose automatically
+        start: float | None
+            The position of the first bin edge, below which samples are ignored
+        end: float | None
+            The position above which samples are ignored
+        size: float | None
+            The width of the bins, or None to choose a round width
+        histfunc: str
+            One of "count", "sum", "avg", "min", or "max"
+        date: bool
+            Whether the samples are timestamps
+
+        Returns
+        -------
+        HistogramAccumulator
+            The binned samples
+        """
+        if y is None:
+            histfunc = "count"
+        finite = x[np.isfinite(x)]
+        low = finite.min() if len(finite) else 0
+        high = finite.max() if len(finite) else 1
+        if not size:
+            size = _bin_size(high - low, nbins, max(len(finite), 1))
+        first = (
+            start
+            if start is not None
+            else _shift_start(size * np.floor(low / size), size, finite, date)
+        )
+        if end is None:
+            n_bins = max(int(np.floor((high - first) / size)), 0) + 1
+        else:
+            # The bins stop at the end, allowing for rounding when it is on an edge
+            n_bins = max(int(np.ceil((end - first) / size - 1e-9)), 1)
+        accumulator = cls(
+            first,
+            size,
+            n_bins,
+            histfunc,
+            lower=start,
+            upper=end,
+            max_bins=max(_MAX_BINS, n_bins),
+        )
+        accumulator.add(x, y)
+        return accumulator
+
+    @property
+    def _empty(self) -> float:
+        return {"min": np.inf, "max": -np.inf}.get(self.histfunc, 0)
+
+    @property
+    def edges(self) -> np.ndarray:
+        """The positions of the bin edges. The last is `upper` if that is within
+        the last bin."""
+        edges = self.start + self.size * np.arange(len(self.counts) + 1)
+        if self.upper is not None and edges[-2] < self.upper < edges[-1]:
+            edges[-1] = self.upper
+        return edges
+
+    def add(self, x: "np.ndarray | list", y: "np.ndarray | list | None" = None):
+        """Add samples.
+
+        Parameters
+        ----------
+        x: np.ndarray | list
+            The samples
+        y: np.ndarray | list | None
+            The values aggregated by `histfunc`, one per sample
+        """
+        x = np.asarray(x, dtype=np.float64).ravel()
+        keep = np.isfinite(x)
+        if self.lower is not None:
+            keep &= x >= self.lower
+        if self.upper is not None:
+            keep &= x <= self.upper
+        x = x[keep]
+        if len(x) == 0:
+            return
+        self._include(x.min(), x.max())
+
+        index = np.floor((x - self.start) / self.size).astype(np.intp)
+        np.clip(index, 0, len(self.counts) - 1, out=index)
+        n_bins = len(self.counts)
+        self.counts += np.bincount(index, minlength=n_bins)
+        if self.aggregate is None or y is None:
+            return
+        weights = np.asarray(y, dtype=np.float64).ravel()[keep]
+        if self.histfunc in ["sum", "avg"]:
+            self.aggregate += np.bincount(index, weights, minlength=n_bins)
+        else:
+            reduce = np.minimum if self.histfunc == "min" else np.maximum
+            reduce.at(self.aggregate, index, weights)
+
+    def _include(self, low: float, high: float):
+        while True:
+            first = int(np.floor((low - self.start) / self.size))
+            last = int(np.floor((high - self.start) / self.size))
+            n_bins = len(self.counts)
+            needed = max(last + 1, n_bins) - min(first, 0)
+            if needed <= self.max_bins:
+                break
+            self._merge()
+        before, after = max(-first, 0), max(last + 1 - n_bins, 0)
+        if before or after:
+            self.start -= before * self.size
+            self.counts = np.pad(self.counts, (before, after))
+            if self.aggregate is not None:
+                self.aggregate = np.pad(
+                    self.aggregate, (before, after), constant_values=self._empty
+                )
+
+    def _merge(self):
+        if len(self.counts) % 2:
+            self.counts = np.append(self.counts, 0)
+            if self.aggregate is not None:
+                self.aggregate = np.append(self.aggregate, self._empty)
+        self.size *= 2
+        self.counts = self.counts[::2] + self.counts[1::2]
+        if self.histfunc in ["sum", "avg"]:
+            self.aggregate = self.aggregate[::2] + self.aggregate[1::2]
+        elif self.aggregate is not None:
+            reduce = np.minimum if self.histfunc == "min" else np.maximum
+            self.aggregate = reduce(self.aggregate[::2], self.aggregate[1::2])
+
+    def copy(self) -> "HistogramAccumulator":
+        """Copy the accumulator, so that it can be extended without affecting this
+        one.
+
+        Returns
+        -------
+        HistogramAccumulator
+            A copy of the accumulator
+        """
+        accumulator = copy.copy(self)
+        accumulator.counts = self.counts.copy()
+        if self.aggregate is not None:
+            accumulator.aggregate = self.aggregate.copy()
+        return accumulator
+
+    def values(
+        self,
+        histnorm: str = "",
+        cumulative: tuple[bool, str, str] = (False, "increasing", "include"),
+    ) -> np.ndarray:
+        """Get the value of each bin.
+
+        Parameters
+        ----------
+        histnorm: str
+            One of "", "percent", "probability", "density", or
+            "probability density"
+        cumulative: tuple[bool, str, str]
+            Plotly's cumulative.enabled, cumulative.direction and
+            cumulative.currentbin
+
+        Returns
+        -------
+        np.ndarray
+            The value of each bin
+        """
+        counts = self.counts
+        if self.histfunc == "avg":
+            values = np.divide(
+                self.aggregate, counts, out=np.zeros(len(counts)), where=counts > 0
+            )
+        elif self.aggregate is not None:
+            values = np.where(counts > 0, self.aggregate, 0)
+        else:
+            values = counts.copy()
+
+        if histnorm in ["percent", "probability", "probability density"]:
+            total = values.sum()
+            values = values / total if total else values
+            if histnorm == "percent":
+                values = values * 100
+        if histnorm in ["density", "probability density"]:
+            values = values / self.size
+
+        enabled, direction, currentbin = cumulative
+        if enabled:
+            if direction == "decreasing":
+                values = values[::-1]
+            running = np.cumsum(values)
+            if currentbin == "exclude":
+                running = running - values
+            elif currentbin == "half":
+                running = running - values / 2
+            values = running[::-1] if direction == "decreasing" else running
+        return values
@@ -1,7 +1,21 @@
-"""Utilities to type plotly dicts."""
+"""Utilities to type plotly dicts.
 
+The plotly schema is several megabytes of JSON, so it is not parsed at import
+time. Sections of it (the layout attributes and each trace type) are loaded on
+demand from a compact index written to the user cache directory the first time
+the schema is needed. The index is keyed by the schema file so that an updated
+schema is re-indexed automatically.
+"""
+
+import functools
+import hashlib
 import importlib.resources
 import json
+import os
+import pathlib
+import pickle
+import struct
+import tempfile
 import typing
 
 import numpy as np
@@ -10,17 +24,167 @@ file = importlib.resources.files(anchor="plotly_gtk.utils.plotly_types").joinpat
     "plot-schema.json"
 )
 
-with open(file, encoding="utf-8") as f:
-    schema = json.load(f)
-
-layout_attributes = schema["layout"]["layoutAttributes"]
-data_attributes = schema["traces"]
+_INDEX_MAGIC = b"PLOTLY-GTK-SCHEMA-INDEX-1\n"
+_HEADER = struct.Struct("<Q")
 
 if typing.TYPE_CHECKING:
     SchemaType = dict[str, "SchemaType" | str]
     GenericType = dict[str, "GenericType" | float | str | bool]
 
 
+def _cache_dir() -> pathlib.Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+    return pathlib.Path(cache_home) / "plotly_gtk"
+
+
+def _schema_key() -> str:
+    stat = os.stat(file)
+    key = f"{file}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _split_schema(full_schema: "SchemaType") -> dict[str, "SchemaType"]:
+    sections = {
+        "layout": full_schema["layout"]["layoutAttributes"],
+        "traces": list(full_schema["traces"]),
+    }
+    for name, trace in full_schema["traces"].items():
+        sections[f"traces/{name}"] = trace
+    return sections
+
+
+def _write_index(path: pathlib.Path, sections: dict[str, "SchemaType"]) -> None:
+    blobs = {
+        name: pickle.dumps(section, protocol=pickle.HIGHEST_PROTOCOL)
+        for name, section in sections.items()
+    }
+    offsets = {}
+    offset = 0
+    for name, blob in blobs.items():
+        offsets[name] = (offset, len(blob))
+        offset += len(blob)
+    index = pickle.dumps(offsets, protocol=pickle.HIGHEST_PROTOCOL)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+        try:
+            f.write(_INDEX_MAGIC)
+            f.write(_HEADER.pack(len(index)))
+            f.write(index)
+            for blob in blobs.values():
+                f.write(blob)
+            f.close()
+            os.replace(f.name, path)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+
+
+class _SchemaIndex:
+    """Random access to the sections of the plotly schema.
+
+    Sections are read from the on-disk index when it exists; otherwise the
+    schema is parsed once, split into sections, and the index is written for the
+    next process. If the index cannot be written the parsed sections are kept in
+    memory instead.
+    """
+
+    def __init__(self) -> None:
+        self.path = _cache_dir() / f"plot-schema-{_schema_key()}.idx"
+        self.sections: dict[str, "SchemaType"] = {}
+        self.offsets: dict[str, tuple[int, int]] = {}
+        self.data_start = 0
+        if not self._read_offsets():
+            self._build()
+
+    def _build(self) -> None:
+        with open(file, encoding="utf-8") as f:
+            self.sections = _split_schema(json.load(f))
+        self.offsets = {}
+        try:
+            _write_index(self.path, self.sections)
+        except OSError:
+            pass
+
+    def _read_offsets(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(len(_INDEX_MAGIC)) != _INDEX_MAGIC:
+                    return False
+                (length,) = _HEADER.unpack(f.read(_HEADER.size))
+                self.offsets = pickle.loads(f.read(length))
+                self.data_start = f.tell()
+        except (OSError, pickle.UnpicklingError, struct.error, EOFError, ValueError):
+            return False
+        return True
+
+    def __getitem__(self, name: str) -> "SchemaType":
+        if name not in self.sections:
+            try:
+                offset, length = self.offsets[name]
+            except KeyError as e:
+                raise KeyError(f"Unknown schema section: {name}") from e
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(self.data_start + offset)
+                    self.sections[name] = pickle.loads(f.read(length))
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                # The index was truncated or replaced since its offsets were read
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+                self._build()
+                if name not in self.sections:
+                    raise KeyError(f"Unknown schema section: {name}") from None
+        return self.sections[name]
+
+
+@functools.cache
+def _index() -> _SchemaIndex:
+    return _SchemaIndex()
+
+
+def get_trace_schema(trace_type: str) -> "SchemaType":
+    """
+    Get the schema for a single trace type.
+
+    Parameters
+    ----------
+    trace_type: str
+        The trace type, e.g. "scatter"
+
+    Returns
+    -------
+    SchemaType
+        The part of the plotly schema describing this trace type
+    """
+    return _index()[f"traces/{trace_type}"]
+
+
+def _load_schema() -> "SchemaType":
+    with open(file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+_lazy_attributes = {
+    "schema": functools.cache(_load_schema),
+    "layout_attributes": lambda: _index()["layout"],
+    "data_attributes": lambda: {
+        trace: get_trace_schema(trace) for trace in _index()["traces"]
+    },
+    "Layout": lambda: get_type("layout"),
+    "Data": lambda: get_type("data"),
+}
+
+
+def __getattr__(name: str) -> object:
+    if name in _lazy_attributes:
+        return _lazy_attributes[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def build_type(attribute: "GenericType") -> type:
     """
     Build a type variable for part of the plotly schema.
@@ -63,12 +227,7 @@ def build_type(attribute: "GenericType") -> type:
     return dict[str, typing.Union[*OUT_TYPES]]
 
 
-Layout = build_type(layout_attributes)
-Data = typing.Union[
-    *[build_type(trace["attributes"]) for trace in data_attributes.values()]
-]
-
-prebuilt_types = {"layout": Layout, "data": Data}
+prebuilt_types: dict[str, type] = {}
 
 
 def get_schema(*args: list[str]) -> "SchemaType":
@@ -86,11 +245,11 @@ def get_schema(*args: list[str]) -> "SchemaType":
         The relevant part of the ploty schema
     """
     if args[0] == "layout":
-        schema_dict = layout_attributes
+        schema_dict = _index()["layout"]
         for key in args[1:]:
             schema_dict = schema_dict[key]
     elif args[0] == "data":
-        schema_dict = data_attributes[args[1]]["attributes"]
+        schema_dict = get_trace_schema(args[1])["attributes"]
         for key in args[2:]:
             schema_dict = schema_dict[key]
     return schema_dict
@@ -111,10 +270,15 @@ def get_type(*args: list[str]) -> type:
         A type defining part of the plotly schema
 
     """
-    if "_".join(args) not in prebuilt_types:
-        schema_dict = get_schema(*args)
-        prebuilt_types["_".join(args)] = build_type(schema_dict)
-    return prebuilt_types["_".join(args)]
+    key = "_".join(args)
+    if key not in prebuilt_types:
+        if args == ("data",):
+            prebuilt_types[key] = typing.Union[
+                *[get_type("data", trace) for trace in _index()["traces"]]
+            ]
+        else:
+            prebuilt_types[key] = build_type(get_schema(*args))
+    return prebuilt_types[key]
 
 
 def get_keys(*args: list[str]) -> type({}.keys()):
@@ -0,0 +1,78 @@
+"""This module provides a scheduler which runs a widget's updates from its frame
+clock, so that any number of changes between frames cause a single update."""
+
+from typing import Callable
+
+
+class FrameScheduler:
+    """Runs a callback at most once per frame of a widget after it is scheduled.
+
+    The callback is run from a tick callback of the widget's
+    :class:`Gdk.FrameClock`, so repeated calls to :meth:`schedule` between frames
+    are coalesced into a single call. No work is done while the widget is
+    unmapped; a pending call is run when it is next mapped.
+
+    Parameters
+    ----------
+    widget: Gtk.Widget
+        The widget whose frame clock drives the callback
+    callback: Callable[[], None]
+        The function to run
+    max_fps: float | None
+        The maximum number of times per second to run the callback, or None to
+        run it on every frame where it is pending
+    """
+
+    def __init__(
+        self,
+        widget: "Gtk.Widget",
+        callback: Callable[[], None],
+        max_fps: float | None = None,
+    ):
+        self.widget = widget
+        self.callback = callback
+        self.max_fps = max_fps
+        self.pending = False
+        self._tick_id = None
+        self._last_frame_time = None
+        widget.connect("map", lambda _: self._start())
+        widget.connect("unmap", lambda _: self._stop())
+
+    def schedule(self):
+        """Run the callback on the next frame, or on the first frame after the
+        widget is mapped."""
+        self.pending = True
+        self._start()
+
+    def flush(self):
+        """Run the callback now if it is pending."""
+        if self.pending:
+            self._stop()
+            self._run(self._last_frame_time)
+
+    def _start(self):
+        if self.pending and self._tick_id is None and self.widget.get_mapped():
+            self._tick_id = self.widget.add_tick_callback(self._on_tick)
+
+    def _stop(self):
+        if self._tick_id is not None:
+            self.widget.remove_tick_callback(self._tick_id)
+            self._tick_id = None
+
+    def _on_tick(self, widget, frame_clock) -> bool:  # pylint: disable=unused-argument
+        frame_time = frame_clock.get_frame_time()
+        if (
+            self.max_fps
+            and self._last_frame_time is not None
+            and frame_time - self._last_frame_time < 1e6 / self.max_fps
+        ):
+            return True
+        # The callback may schedule another call, which needs a new tick callback
+        self._tick_id = None
+        self._run(frame_time)
+        return False
+
+    def _run(self, frame_time):
+        self.pending = False
+        self._last_frame_time = frame_time
+        self.callback()
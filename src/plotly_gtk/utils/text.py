@@ -0,0 +1,176 @@
+"""This module provides a cache of laid out text, so that labels which are measured
+or drawn repeatedly, such as tick labels, are only shaped by Pango once.
+
+The cache is shared by all threads. Layouts are made for the device scale and font
+options of the cairo context which the calling thread last gave to
+:func:`update_context`, and are discarded when the font map changes. They are shaped
+at the resolution of the device, so must be drawn with :func:`show_layout`. Creating
+or drawing a layout holds a lock, as Pango contexts can not be used by several
+threads at once.
+"""
+
+import collections
+import threading
+
+import gi
+
+gi.require_version("Pango", "1.0")
+gi.require_version("PangoCairo", "1.0")
+gi.require_foreign("cairo")
+from gi.repository import (  # pylint: disable=wrong-import-position,wrong-import-order
+    Pango,
+    PangoCairo,
+)
+
+_CACHE_SIZE = 4096
+
+_lock = threading.Lock()
+_DPI = 96
+
+_lock = threading.Lock()
+# The Pango context and its serial for each device scale and font options
+_contexts: dict[tuple[float, int | None], tuple[Pango.Context, int]] = {}
+_layouts: collections.OrderedDict[
+    tuple[float, int | None, str, str, bool],
+    tuple[Pango.Layout, tuple[float, float]],
+] = collections.OrderedDict()
+
+
+class _Target(threading.local):
+    """The device scale and font options of the context a thread is drawing on."""
+
+    def __init__(self):
+        super().__init__()
+        self.key: tuple[float, int | None] = (1, None)
+        self.context = None
+
+
+_target = _Target()
+
+
+def update_context(context: "cairo.Context"):
+    """Lay out text in the calling thread for drawing on a cairo context, using its
+    device scale and font options.
+
+    Parameters
+    ----------
+    context: cairo.Context
+        The context the text will be drawn on
+    """
+    surface = context.get_target()
+    font_options = surface.get_font_options()
+    font_options.merge(context.get_font_options())
+    _target.key = (surface.get_device_scale()[0], font_options.hash())
+    _target.context = context
+
+
+def invalidate():
+    """Discard the cached layouts."""
+    with _lock:
+        _contexts.clear()
+        _layouts.clear()
+
+
+def _get_context(key: tuple[float, int | None]) -> Pango.Context:
+    # Must be called with the lock held
+    if key in _contexts:
+        context, serial = _contexts[key]
+        if context.get_serial() == serial:
+            return context
+        for stale in [layout_key for layout_key in _layouts if layout_key[:2] == key]:
+            del _layouts[stale]
+    scale = key[0]
+    context = PangoCairo.FontMap.get_default().create_context()
+    PangoCairo.context_set_resolution(context, _DPI * scale)
+    if _target.context is not None:
+        cairo_context = _target.context
+        PangoCairo.context_set_font_options(context, cairo_context.get_font_options())
+        cairo_context.save()
+        cairo_context.scale(1 / scale, 1 / scale)
+        PangoCairo.update_context(cairo_context, context)
+        cairo_context.restore()
+    _contexts[key] = (context, context.get_serial())
+    return context
+
+
+def text_layout(
+    font: Pango.FontDescription, text: str, markup: bool = False
+) -> tuple[Pango.Layout, tuple[float, float]]:
+    """Get a layout of text, and its size.
+
+    Parameters
+    ----------
+    font: Pango.FontDescription
+        The font of the text
+    text: str
+        The text
+    markup: bool
+        Whether the text is Pango markup
+
+    Returns
+    -------
+    tuple[Pango.Layout, tuple[float, float]]
+        The layout, which must not be modified, and its width and height in user
+        space units
+    """
+    target = _target.key
+    key = (*target, font.to_string(), text, markup)
+    with _lock:
+        context = _get_context(target)
+        if key in _layouts:
+            _layouts.move_to_end(key)
+            return _layouts[key]
+        layout = Pango.Layout(context)
+        layout.set_font_description(font)
+        if markup:
+            layout.set_markup(text)
+        else:
+            layout.set_text(text)
+        _layouts[key] = (
+            layout,
+            tuple(size / target[0] for size in layout.get_pixel_size()),
+        )
+        while len(_layouts) > _CACHE_SIZE:
+            _layouts.popitem(last=False)
+        return _layouts[key]
+
+
+def text_size(
+    font: Pango.FontDescription, text: str, markup: bool = False
+) -> tuple[float, float]:
+    """Get the size of text.
+
+    Parameters
+    ----------
+    font: Pango.FontDescription
+        The font of the text
+    text: str
+        The text
+    markup: bool
+        Whether the text is Pango markup
+
+    Returns
+    -------
+    tuple[float, float]
+        The width and height of the text in user space units
+    """
+    return text_layout(font, text, markup)[1]
+
+
+def show_layout(context: "cairo.Context", layout: Pango.Layout):
+    """Draw a layout from :func:`text_layout` at the current point.
+
+    Parameters
+    ----------
+    context: cairo.Context
+        The context to draw on, which must have been given to :func:`update_context`
+    layout: Pango.Layout
+        The layout
+    """
+    scale = PangoCairo.context_get_resolution(layout.get_context()) / _DPI
+    context.save()
+    context.scale(1 / scale, 1 / scale)
+    with _lock:
+        PangoCairo.update_layout(context, layout)
+        PangoCairo.show_layout(context, layout)
+    context.restore()
@@ -1,11 +1,29 @@
+import collections
+import html
 import logging
 import numbers
+import threading
 
 import numpy as np
 from prefixed import Float
 
 logger = logging.getLogger(__name__)
 
+_CACHE_SIZE = 256
+# The layout keys which are set by Ticks.calculate
+_RESULTS = ["_dtick", "_tick0", "_tickvals", "_ticktext"]
+# The layout keys which Ticks.calculate depends on, other than the range
+_SETTINGS = ["_type", "tickmode", "tick0", "dtick", "nticks", "tickvals", "ticktext"]
+_cache: collections.OrderedDict[tuple, dict] = collections.OrderedDict()
+# Figures are prepared and drawn in worker threads
+_lock = threading.Lock()
+
+
+def _hashable(value):
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(np.asarray(value).ravel().tolist())
+    return value
+
 
 class Ticks:
     ROUND_SET = {
@@ -102,6 +120,44 @@ class Ticks:
         return inc
 
     def calculate(self):
+        """Calculate the tick values and labels, reusing the result of an earlier
+        call, possibly for another axis, with the same range, length and tick
+        settings.
+
+        Returns
+        -------
+        np.ndarray
+            The tick values
+        """
+        key = (
+            self.axis[0],
+            self.length,
+            tuple(float(value) for value in self.axis_layout["_range"]),
+            tuple(_hashable(self.axis_layout.get(setting)) for setting in _SETTINGS),
+        )
+        with _lock:
+            results = _cache.get(key)
+            if results is not None:
+                _cache.move_to_end(key)
+        if results is None:
+            self._calculate()
+            results = {
+                result: self.axis_layout[result]
+                for result in _RESULTS
+                if result in self.axis_layout
+            }
+            if isinstance(self.axis_layout["_tickvals"], np.ndarray):
+                # Shared between axes with the same key, so must not be modified
+                self.axis_layout["_tickvals"].setflags(write=False)
+            with _lock:
+                _cache[key] = results
+                while len(_cache) > _CACHE_SIZE:
+                    _cache.popitem(last=False)
+        for result, value in results.items():
+            self.axis_layout[result] = list(value) if result == "_ticktext" else value
+        return self.axis_layout["_tickvals"]
+
+    def _calculate(self):
         rev = self.axis_layout["_range"][0] >= self.axis_layout["_range"][-1]
         self.prepare()
 
@@ -115,6 +171,12 @@ class Ticks:
                 self.axis_layout["_range"][-1],
                 self.axis_layout["_dtick"],
             )
+        elif self.axis_layout["_dtick"][0] == "D":
+            logger.debug("Log dtick")
+            _tickvals = self.log_ticks(*sorted(self.axis_layout["_range"]))
+            logger.debug(f"Original _tickvals: {_tickvals}")
+            self.axis_layout["_tickvals"] = np.power(10, _tickvals)
+            logger.debug(f"Corrected _tickvals: {self.axis_layout["_tickvals"]}")
         else:
             logger.debug("Text dtick")
             x = self.tick_first()
@@ -153,6 +215,33 @@ class Ticks:
 
         return self.axis_layout["_tickvals"]
 
+    @classmethod
+    def log_ticks(cls, start: float, end: float) -> np.ndarray:
+        """Get the logarithms of the ticks at 1, 2 and 5 times a power of ten
+        between two logarithms, for "D" ticks. These are used for "D1" as well as
+        "D2", as by :meth:`tick_increment`.
+
+        Parameters
+        ----------
+        start: float
+            The logarithm of the lowest value
+        end: float
+            The logarithm of the highest value
+
+        Returns
+        -------
+        np.ndarray
+            The logarithms of the ticks which are greater than `start` and less
+            than `end`
+        """
+        values = np.round(np.power(10, cls.ROUND_SET["LOG2"]), 1)
+        mantissas = np.log10(
+            np.unique(np.round(values / np.power(10, np.floor(np.log10(values))), 1))
+        )
+        decades = np.arange(np.floor(start), np.floor(end) + 1)
+        ticks = (decades[:, np.newaxis] + mantissas).ravel()
+        return ticks[(ticks > start) & (ticks < end)]
+
     def prepare(self):
         if (
             "tickmode" in self.axis_layout and self.axis_layout["tickmode"] == "auto"
@@ -233,5 +322,9 @@ class Ticks:
         idx_slice = slice(idx_min, idx_max + 1)
 
         self.axis_layout["_tickvals"] = self.axis_layout["tickvals"][idx_slice]
-        self.axis_layout["_ticktext"] = self.axis_layout["ticktext"][idx_slice]
+        # Tick text is drawn as Pango markup
+        self.axis_layout["_ticktext"] = [
+            html.escape(str(text), quote=False)
+            for text in self.axis_layout["ticktext"][idx_slice]
+        ]
         return self.axis_layout["_tickvals"]
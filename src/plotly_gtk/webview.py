@@ -1,7 +1,14 @@
 from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING
 
 import gi
-from plotly import graph_objects as go
+
+from plotly_gtk.utils import LazyModule
+
+if TYPE_CHECKING:
+    from plotly import graph_objects as go
+else:
+    go = LazyModule("plotly.graph_objects")
 
 gi.require_version("WebKit", "6.0")
 from gi.repository import WebKit  # noqa: E402
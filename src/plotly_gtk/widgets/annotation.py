@@ -73,3 +73,14 @@ class Annotation(Base):
 
         self.add_css_class(f"plotly-annotation")
         self.add_css_class(f"rotated-{angle}-text")
+
+    def set_text(self, text: str):
+        """Change the text of the annotation.
+
+        Parameters
+        ----------
+        text: str
+            The new text
+        """
+        if self.label.get_text() != text:
+            self.label.set_text(text)
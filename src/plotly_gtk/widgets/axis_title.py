@@ -8,6 +8,7 @@ from typing import TYPE_CHECKING
 from gi.repository import Gdk, Gtk, Pango  # noqa: E402
 
 from plotly_gtk.utils import parse_font, update_dict
+from plotly_gtk.utils.text import text_size
 from plotly_gtk.widgets.base import Base
 
 if TYPE_CHECKING:
@@ -64,11 +65,10 @@ class AxisTitle(Base):
             angle = 0
         elif axis_letter == "y":
             font_extra = 0
-            layout = Pango.Layout(context)
-            layout.set_font_description(tickfont)
             for tick in axis["_ticktext"]:
-                layout.set_text(tick)
-                font_extra = max(layout.get_pixel_size()[0], font_extra)
+                font_extra = max(
+                    text_size(tickfont, str(tick), markup=True)[0], font_extra
+                )
 
             orientation = "v"
             x = position
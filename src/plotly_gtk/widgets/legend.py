@@ -19,6 +19,7 @@ class Legend(Base):
         super().__init__()
         grid = Gtk.Grid(row_spacing=4, column_spacing=4)
         self.append(grid)
+        self.items = []
 
         if legend["xref"] == "paper":
             x_default = 1.02 if legend["orientation"] == "v" else 0
@@ -117,6 +118,7 @@ class Legend(Base):
             label.add_controller(click)
 
             grid.attach(label, 1, index, 1, 1)
+            self.items.append((icon, label))
             index += 1
 
         if "text" in legend["title"]:
@@ -170,6 +172,18 @@ class Legend(Base):
         )
         self.add_css_class("plotly-legend")
 
+    def update_visibility(self):
+        """Update the entries after traces have been shown or hidden."""
+        for icon, label in self.items:
+            clicked = "_visible" in label.trace and not label.trace["_visible"]
+            label.remove_css_class(
+                "plotly-legend-not-clicked" if clicked else "plotly-legend-clicked"
+            )
+            label.add_css_class(
+                "plotly-legend-clicked" if clicked else "plotly-legend-not-clicked"
+            )
+            icon.queue_draw()
+
 
 class Icon(Gtk.DrawingArea):
     def __init__(self, plot, trace, index):
@@ -196,10 +210,9 @@ class Icon(Gtk.DrawingArea):
 
         if "markers" in modes:
             if "color" in self.trace["marker"]:
-                color = self.trace["marker"]["color"]
+                color = parse_color(self.trace["marker"]["color"])
             else:
-                color = self.plot.layout["template"]["layout"]["colorway"][self.index]
-            color = parse_color(color)
+                color = self.plot.layout["_colorway"][self.index]
             if "_visible" in self.trace and not self.trace["_visible"]:
                 color = [c + (1 - c) / 2 for c in color]
             context.set_source_rgb(*color)
@@ -217,10 +230,9 @@ class Icon(Gtk.DrawingArea):
             self.marker_radius = radius
         if "lines" in modes:
             if "color" in self.trace["line"]:
-                color = self.trace["line"]["color"]
+                color = parse_color(self.trace["line"]["color"])
             else:
-                color = self.plot.layout["template"]["layout"]["colorway"][self.index]
-            color = parse_color(color)
+                color = self.plot.layout["_colorway"][self.index]
             if "_visible" in self.trace and not self.trace["_visible"]:
                 color = [c + (1 - c) / 2 for c in color]
             context.set_source_rgb(*color)
@@ -19,6 +19,7 @@ class UpdateMenu(Base):
         super().__init__()
         default = dict(
             active=0,
+            activecolor="#F4FAFF",
             bgcolor="transparent",
             bordercolor="#BEC8D9",
             borderwidth=1,
@@ -33,6 +34,8 @@ class UpdateMenu(Base):
         )
         updatemenu = update_dict(default, _updatemenu)
         self.spec = updatemenu
+        self.top_button = None
+        self.buttons = []
 
         if updatemenu["direction"] in ["up", "down"]:
             self.set_orientation(Gtk.Orientation.VERTICAL)
@@ -48,6 +51,9 @@ class UpdateMenu(Base):
                 border: {updatemenu["borderwidth"]}px solid {updatemenu["bordercolor"]};
                 box-shadow: none;
             }}
+            .plotly-button button.plotly-active {{
+                background-color: {updatemenu["activecolor"]};
+            }}
             .plotly-button label {{
                 color: {updatemenu["font"]["color"]};
                 font-family: {font["family"]};
@@ -94,6 +100,7 @@ class UpdateMenu(Base):
             top_button.open = False
             top_button.connect("clicked", top_button_clicked)
             self.append(top_button)
+            self.top_button = top_button
 
             width = 0
 
@@ -119,5 +126,24 @@ class UpdateMenu(Base):
                 _button.button = button
                 _button.connect("clicked", on_button_selected)
                 self.append(_button)
+                self.buttons.append(_button)
+            self.set_active(updatemenu["active"])
         else:
             raise ValueError(f"Unknown updatemenu.type: {updatemenu["type"]}")
+
+    def set_active(self, active: int):
+        """Change the active button.
+
+        Parameters
+        ----------
+        active: int
+            The index of the active button
+        """
+        self.spec["active"] = active
+        if self.top_button is not None:
+            self.top_button.set_label(self.spec["buttons"][active]["label"])
+        for i, button in enumerate(self.buttons):
+            if i == active and self.spec["showactive"]:
+                button.add_css_class("plotly-active")
+            else:
+                button.remove_css_class("plotly-active")
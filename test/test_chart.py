@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 from test import get_random_strings
 
 import numpy as np
+import pandas as pd
 
 import pytest
 from plotly_gtk.chart import PlotlyGtk
@@ -48,6 +49,7 @@ datasets = {
         "1000": _1000categories,
         "1000+50 numbers": np.concatenate((_50numbers, _1000categories), dtype=object),
         "1000+50 dates": np.concatenate((_50dates, _1000categories), dtype=object),
+        "pandas categorical": pd.Categorical(_1000categories),
     },
     "multicategory": {"simple": _multicategory_example},
 }
@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+from plotly_gtk.utils.data import RingBuffer, TraceData, to_timestamps
+
+_expected = np.array([946684800.0, 946771200.5])
+
+
+def test_to_timestamps():
+    dates = {
+        "datetime64": np.array(["2000-01-01", "2000-01-02T00:00:00.5"], "datetime64"),
+        "strings": ["2000-01-01", "2000-01-02 00:00:00.5"],
+        "datetimes": [datetime(2000, 1, 1), datetime(2000, 1, 2, 0, 0, 0, 500000)],
+        "timestamps": pd.Series(
+            [pd.Timestamp("2000-01-01 01:00", tz="Europe/Paris")]
+            + [pd.Timestamp("2000-01-02 00:00:00.5", tz=timezone.utc)]
+        ),
+        "milliseconds": [946684800000, 946771200500],
+    }
+    for data in dates.values():
+        np.testing.assert_array_equal(to_timestamps(data), _expected)
+    assert np.isnan(to_timestamps(["2000-01-01", "not a date"])[-1])
+
+
+def test_to_timestamps_mixed_formats():
+    np.testing.assert_array_equal(
+        to_timestamps(["2000-01-01", "2000-01-02 00:00:00.5", "2000-01-02T12:00"]),
+        [946684800.0, 946771200.5, 946814400.0],
+    )
+    np.testing.assert_array_equal(
+        to_timestamps(["Jan 1 2000", "2000-01-02 00:00:00.5"]), _expected
+    )
+
+
+def test_ring_buffer():
+    buffer = RingBuffer([0, 1, 2], capacity=5)
+    for start in range(3, 100, 3):
+        dropped = buffer.extend(np.arange(start, start + 3))
+        np.testing.assert_array_equal(buffer.values, np.arange(start - 2, start + 3))
+        assert buffer.values.flags.c_contiguous
+    assert dropped.tolist() == [94, 95, 96]
+    unbounded = RingBuffer([])
+    unbounded.extend(np.arange(1000))
+    assert len(unbounded) == 1000
+
+
+def test_trace_data_extend():
+    trace_data = TraceData()
+    trace_data.set("x", np.arange(10.0))
+    trace_data.set("y", np.arange(10.0))
+    assert trace_data.extent("y") == (0, 9)
+    assert trace_data.is_sorted("x")
+    version = trace_data.version
+
+    trace_data.extend({"x": [10, 11], "y": [-5, 20]})
+    assert trace_data.extent("y") == (-5, 20)
+    assert trace_data.is_sorted("x")
+    assert trace_data.appended_since(version) == 2
+
+    trace_data.extend({"x": [12, 13], "y": [0, 0]}, max_points=12)
+    assert len(trace_data.x) == 12 and trace_data.x[0] == 2
+    assert trace_data.extent("y") == (-5, 20)
+    assert trace_data.appended_since(version) is None
+
+    trace_data.extend({"x": [1], "y": [0]}, max_points=12)
+    assert trace_data.extent("y") == (-5, 20)
+    assert not trace_data.is_sorted("x")
+
+
+def test_trace_data_extend_derived():
+    trace_data = TraceData()
+    trace_data.set("x", np.arange(1.0, 11.0))
+    trace_data.set("y", np.linspace(-1, 1, 10))
+    trace_data.set("size", np.full(10, 6.0))
+    assert trace_data.is_sorted("x", log=True)
+    trace_data.finite(log_y=True)
+    for start in range(11, 50, 4):
+        trace_data.extend(
+            {
+                "x": np.arange(start, start + 4),
+                "y": [1, -1, np.nan, 2],
+                "size": [6] * 4,
+            },
+            max_points=20,
+        )
+        np.testing.assert_array_equal(trace_data.log10("x"), np.log10(trace_data.x))
+        np.testing.assert_array_equal(
+            trace_data.finite(log_y=True),
+            np.isfinite(trace_data.x) & (trace_data.y > 0),
+        )
+        assert trace_data.is_sorted("x", log=True)
+    assert len(trace_data.x) == len(trace_data.y) == len(trace_data.size) == 20
+
+    with pytest.raises(ValueError):
+        trace_data.extend({"x": [60.0], "y": [0.0]})
+    with pytest.raises(ValueError):
+        trace_data.extend({"x": [60.0], "y": [0.0, 1.0], "size": [6]})
+    categorical = TraceData()
+    categorical.set("x", ["a", "b"])
+    categorical.set("y", [0, 1])
+    with pytest.raises(ValueError):
+        categorical.extend({"x": ["c"], "y": [2]})
@@ -0,0 +1,67 @@
+import numpy as np
+from plotly import graph_objects as go
+
+import pytest
+from plotly_gtk.export import main, render
+
+
+def _figure():
+    fig = go.Figure()
+    fig.add_scatter(x=np.arange(100), y=np.random.random(100))
+    fig.add_histogram(x=np.random.random(1000), xaxis="x2", yaxis="y2")
+    fig.update_layout(
+        xaxis=dict(domain=[0, 0.45]), xaxis2=dict(domain=[0.55, 1]), yaxis2=dict()
+    )
+    return fig
+
+
+def test_render():
+    png = render(_figure(), 300, 200, scale=2)
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    assert int.from_bytes(png[16:20], "big") == 600
+    assert int.from_bytes(png[20:24], "big") == 400
+    assert b"<svg" in render(_figure(), format="svg")
+    assert render(_figure(), format="pdf").startswith(b"%PDF")
+
+
+def test_render_dict():
+    data = [{"type": "scatter", "x": [0, 1], "y": [0, 1]}]
+    assert render({"data": data})[:4] == b"\x89PNG"
+    fig = {"data": data, "layout": {"template": "plotly_dark"}}
+    assert b"<svg" in render(fig, format="svg")
+    assert fig == {"data": data, "layout": {"template": "plotly_dark"}}
+
+
+def test_render_markers():
+    fig = go.Figure(go.Scatter(x=np.arange(100), y=np.arange(100), mode="markers"))
+    fig.add_scatter(
+        x=np.arange(100),
+        y=np.arange(100)[::-1],
+        mode="markers",
+        marker_symbol="circle-open-dot",
+    )
+    assert render(fig, 200, 200)[:4] == b"\x89PNG"
+    assert render(fig, 200, 200, format="pdf").startswith(b"%PDF")
+
+
+def test_render_file(tmp_path):
+    path = tmp_path / "figure.png"
+    assert render(_figure(), file=path) is None
+    assert path.read_bytes()[:4] == b"\x89PNG"
+    with pytest.raises(ValueError):
+        render(_figure(), format="gif")
+
+
+def test_main(tmp_path, capsys):
+    figures = tmp_path / "figures"
+    figures.mkdir()
+    for name in ["a", "b"]:
+        _figure().write_json(figures / f"{name}.json")
+    (figures / "broken.json").write_text("{}")
+
+    assert main([str(figures), "-o", str(tmp_path / "images"), "-j", "2"]) == 1
+    assert sorted(path.name for path in (tmp_path / "images").iterdir()) == [
+        "a.png",
+        "b.png",
+    ]
+    assert "Rendered 2 of 3 figures" in capsys.readouterr().out
@@ -0,0 +1,54 @@
+import concurrent.futures
+import threading
+
+import numpy as np
+
+import pytest
+from plotly_gtk._figure import prepare_figure
+
+
+def _figure():
+    return {
+        "data": [
+            {"type": "scatter", "x": np.arange(10.0), "y": np.arange(10.0)},
+            {"type": "histogram", "x": np.random.random(1000)},
+        ],
+        "layout": {"template": {"layout": {"xaxis": {}, "yaxis": {}}}},
+    }
+
+
+def test_prepare_figure():
+    figure = prepare_figure(_figure())
+    assert [plot["type"] for plot in figure.data] == ["scatter", "histogram"]
+    assert figure.fig["data"] is figure.data
+    assert figure.layout["xaxis"]["_range"][0] < 0
+    assert figure.layout["xaxis"]["_range"][-1] > 9
+
+
+def test_prepare_figure_cancelled():
+    cancelled = threading.Event()
+    cancelled.set()
+    with pytest.raises(concurrent.futures.CancelledError):
+        prepare_figure(_figure(), cancelled)
+
+
+def test_categorical_histogram_labels():
+    fig = _figure()
+    fig["data"][1]["x"] = np.array(["b", "a", "b", "c"], dtype=object)
+    figure = prepare_figure(fig)
+    np.testing.assert_array_equal(figure.layout["xaxis"]["_tickvals"], [0, 1, 2])
+    assert figure.layout["xaxis"]["_ticktext"] == ["b", "a", "c"]
+
+
+def test_tick_label_margins():
+    fig = _figure()
+    fig["layout"]["yaxis"] = dict(
+        tickmode="array", tickvals=[0, 5], ticktext=["0", "A long tick label" * 10]
+    )
+    figure = prepare_figure(fig)
+    margin = dict(figure.layout["_margin"])
+    pushmargins = figure._tick_label_pushmargins(700, 450)
+    assert figure._push_margins(pushmargins, 700, 450)
+    assert figure.layout["_margin"]["l"] > margin["l"]
+    assert figure.layout["_margin"]["b"] == margin["b"]
+    assert not figure._push_margins(figure._tick_label_pushmargins(700, 450), 700, 450)
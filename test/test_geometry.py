@@ -0,0 +1,119 @@
+import numpy as np
+
+from plotly_gtk.utils.geometry import (
+    bar_outline,
+    decimate,
+    finite_segments,
+    group_markers,
+    in_bounds,
+    parse_symbol,
+    spline_controls,
+    step_vertices,
+    visible_slice,
+)
+
+
+def test_decimate():
+    x_pos = np.linspace(0, 100, 100000)
+    y_pos = np.cumsum(np.random.randn(100000))
+    y_pos[5000:5010] = np.nan
+    keep = decimate(x_pos, y_pos)
+    assert len(keep) <= 4 * 101 + 10
+    assert keep[0] == 0 and keep[-1] == len(x_pos) - 1
+    assert np.isnan(y_pos[keep]).sum() == 10
+
+    finite = np.isfinite(y_pos)
+    columns = np.floor(x_pos[finite])
+    for column in [0, 37, 99]:
+        in_column = y_pos[finite][columns == column]
+        kept = y_pos[keep][np.floor(x_pos[keep]) == column]
+        assert np.nanmin(kept) == in_column.min()
+        assert np.nanmax(kept) == in_column.max()
+
+
+def test_visible_slice():
+    values = np.arange(100.0)
+    assert visible_slice(values, 10.5, 20.5) == slice(10, 22)
+    assert visible_slice(values, 10.5, 20.5, padding=0) == slice(11, 21)
+    assert visible_slice(values, -50, 150) == slice(0, 100)
+    assert visible_slice(values, 200, 300) == slice(99, 100)
+
+
+def test_in_bounds():
+    x_pos = np.array([0, 5, 12, np.nan])
+    y_pos = np.array([5, 5, 5, 5])
+    np.testing.assert_array_equal(
+        in_bounds(x_pos, y_pos, (1, 10, 0, 10)), [False, True, False, False]
+    )
+    np.testing.assert_array_equal(
+        in_bounds(x_pos, y_pos, (1, 10, 0, 10), margin=2), [True, True, True, False]
+    )
+
+
+def test_parse_symbol():
+    assert parse_symbol("circle") == ("circle", False, False)
+    assert parse_symbol("triangle-up-open-dot") == ("triangle-up", True, True)
+    assert parse_symbol(102) == ("diamond", True, False)
+    assert parse_symbol("17") == ("star", False, False)
+    assert parse_symbol("line-ew") == ("line-ew", True, False)
+    assert parse_symbol("not-a-symbol") == ("circle", False, False)
+
+
+def test_group_markers():
+    x_pos = np.array([0, 0.01, 10, 10, 20])
+    y_pos = np.array([0, 0.01, 10, 10, 20])
+    radius = np.array([3, 3, 3, 5, 3])
+    symbol = np.array(["circle", "circle", "circle", "circle", "square"])
+    groups = group_markers(x_pos, y_pos, radius, symbol)
+    assert [(g[0], g[1], len(g[2])) for g in groups] == [
+        ("circle", 3, 2),
+        ("circle", 5, 1),
+        ("square", 3, 1),
+    ]
+    assert len(group_markers(x_pos, y_pos, 3, "x")) == 1
+    assert not group_markers(x_pos[:0], y_pos[:0], 3, "x")
+
+
+def test_finite_segments():
+    x_pos = np.array([0, 1, np.nan, 3, 4, 5, 6, np.inf])
+    y_pos = np.array([0, 1, 2, 3, np.nan, 5, 6, 7])
+    assert finite_segments(x_pos, y_pos).tolist() == [[0, 2], [3, 4], [5, 7]]
+    assert finite_segments(x_pos[:0], y_pos[:0]).shape == (0, 2)
+
+
+def test_step_vertices():
+    x_pos = np.array([0.0, 2, 4])
+    y_pos = np.array([0.0, 1, 3])
+    x_hv, y_hv = step_vertices(x_pos, y_pos, "hv")
+    assert x_hv.tolist() == [0, 2, 2, 4, 4]
+    assert y_hv.tolist() == [0, 0, 1, 1, 3]
+    x_vh, y_vh = step_vertices(x_pos, y_pos, "vh")
+    assert x_vh.tolist() == [0, 0, 2, 2, 4]
+    assert y_vh.tolist() == [0, 1, 1, 3, 3]
+    x_hvh, y_hvh = step_vertices(x_pos, y_pos, "hvh")
+    assert x_hvh.tolist() == [0, 1, 1, 2, 3, 3, 4]
+    assert y_hvh.tolist() == [0, 0, 1, 1, 1, 3, 3]
+    assert step_vertices(x_pos, y_pos, "linear")[0] is x_pos
+
+    y_pos[1] = np.nan
+    x_hv, y_hv = step_vertices(x_pos, y_pos, "hv")
+    assert np.isfinite(x_hv + y_hv).tolist() == [True, False, False, False, True]
+
+
+def test_spline_controls():
+    x_pos = np.array([0.0, 1, 2, 3])
+    first_x, first_y, second_x, second_y = spline_controls(x_pos, 2 * x_pos)
+    assert len(first_x) == 3
+    # Control points of a straight line lie on it
+    np.testing.assert_allclose(first_y, 2 * first_x)
+    np.testing.assert_allclose(second_y, 2 * second_x)
+    assert np.all(np.diff(np.column_stack((first_x, second_x)).ravel()) >= 0)
+
+
+def test_bar_outline():
+    edges = np.arange(6.0)
+    heights = np.array([1.0, 2, 2, 0, 0])
+    x_vertices, y_vertices = bar_outline(edges, heights)
+    assert x_vertices.tolist() == [0, 0, 1, 1, 3, 3, 5, 5]
+    assert y_vertices.tolist() == [0, 1, 1, 2, 2, 0, 0, 0]
+    assert len(bar_outline(edges, np.zeros(5), 1)[0]) == 4
@@ -0,0 +1,99 @@
+import numpy as np
+
+from plotly_gtk.utils.histogram import (
+    HistogramAccumulator,
+    cached_histogram,
+    histogram,
+)
+
+
+def test_histogram():
+    x = np.random.randn(10000)
+    edges, counts, categories = histogram(x, nbins=20)
+    assert categories is None
+    assert len(counts) <= 21
+    assert counts.sum() == len(x)
+    np.testing.assert_array_equal(counts, np.histogram(x, edges)[0])
+
+    for end, expected in [
+        (1, [-1, -0.5, 0, 0.5, 1]),
+        (0.8, [-1, -0.5, 0, 0.5, 0.8]),
+    ]:
+        edges, counts, _ = histogram(x, start=-1, end=end, size=0.5)
+        np.testing.assert_allclose(edges, expected)
+        np.testing.assert_array_equal(counts, np.histogram(x, expected)[0])
+
+    _, density, _ = histogram(x, size=0.5, histnorm="probability density")
+    assert np.isclose(density.sum() * 0.5, 1)
+
+    _, cumulative, _ = histogram(x, cumulative=(True, "increasing", "include"))
+    assert cumulative[-1] == len(x)
+    assert np.all(np.diff(cumulative) >= 0)
+
+
+def test_histogram_nbins():
+    # The bins plotly.js gives for these samples with nbinsx=5
+    edges, counts, _ = histogram(np.arange(11.0), nbins=5)
+    np.testing.assert_allclose(edges, np.arange(-0.5, 12, 2))
+    assert counts.tolist() == [2, 2, 2, 2, 2, 1]
+
+    edges, _, _ = histogram(np.arange(11.0), nbins=5, date=True)
+    np.testing.assert_allclose(edges, np.arange(0, 13, 2))
+
+
+def test_histogram_functions():
+    x = np.array([0.5, 0.6, 1.5, 2.5])
+    y = np.array([1.0, 3, 5, 7])
+    assert histogram(x, y, size=1, histfunc="sum")[1].tolist() == [4, 5, 7]
+    assert histogram(x, y, size=1, histfunc="avg")[1].tolist() == [2, 5, 7]
+    assert histogram(x, y, size=1, histfunc="max")[1].tolist() == [3, 5, 7]
+    assert histogram(x, size=1, histnorm="percent")[1].tolist() == [50, 25, 25]
+
+
+def test_categorical_histogram():
+    x = np.array(["b", "a", "b", "c", "b"])
+    edges, counts, categories = histogram(x)
+    assert categories.tolist() == ["b", "a", "c"]
+    assert counts.tolist() == [3, 1, 1]
+    assert edges.tolist() == [-0.5, 0.5, 1.5, 2.5]
+
+
+def test_cached_histogram():
+    x = np.random.rand(1000)
+    first = cached_histogram((x, None), x, nbins=10)
+    assert cached_histogram((x, None), x, nbins=10) is first
+    assert cached_histogram((x, None), x, nbins=5) is not first
+    assert cached_histogram((x.copy(), None), x, nbins=10) is not first
+
+    samples = [1.0, 2.0, 2.0]
+    first = cached_histogram((samples, None), np.array(samples), size=1)
+    assert cached_histogram((samples, None), np.array(samples), size=1) is first
+    samples[0] = 2.0
+    _, counts, _ = cached_histogram((samples, None), np.array(samples), size=1)
+    assert counts.max() == 3
+    samples.append(5.0)
+    edges, _, _ = cached_histogram((samples, None), np.array(samples), size=1)
+    assert edges[-1] > 5
+
+
+def test_histogram_accumulator():
+    x = np.random.randn(10000)
+    accumulator = HistogramAccumulator.from_samples(x[:5000], size=0.5)
+    accumulator.add(x[5000:])
+    edges, counts, _ = histogram(x, size=0.5)
+    np.testing.assert_allclose(accumulator.edges, edges)
+    np.testing.assert_array_equal(accumulator.values(), counts)
+
+    accumulator.add([100])
+    assert accumulator.edges[-1] > 100
+    assert accumulator.values().sum() == len(x) + 1
+
+    accumulator.max_bins = 50
+    accumulator.add([-1000])
+    assert len(accumulator.counts) <= 50
+    assert accumulator.edges[0] <= -1000
+    assert accumulator.values().sum() == len(x) + 2
+
+    copy = accumulator.copy()
+    copy.add(x)
+    assert accumulator.values().sum() == len(x) + 2
@@ -0,0 +1,43 @@
+"""Import time budget for :mod:`plotly_gtk.chart`.
+
+Run ``python -X importtime -c "import plotly_gtk.chart"`` in a fresh interpreter
+and fail if heavy optional dependencies are imported or if the cumulative import
+time of the chart module exceeds the budget. The budget can be overridden with
+the ``PLOTLY_GTK_IMPORT_BUDGET_MS`` environment variable on slow runners.
+"""
+
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = float(os.environ.get("PLOTLY_GTK_IMPORT_BUDGET_MS", 1500))
+FORBIDDEN_MODULES = ["pandas", "plotly"]
+
+SCRIPT = """
+from plotly_gtk.chart import PlotlyGtk
+from plotly_gtk.utils import plotly_types
+assert plotly_types._index.cache_info().currsize == 0, "plot-schema.json was read"
+"""
+
+
+def _import_times():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_time():
+    times = _import_times()
+    for module in times:
+        assert module.split(".")[0] not in FORBIDDEN_MODULES, f"{module} imported"
+    assert times["plotly_gtk.chart"] / 1000 < IMPORT_BUDGET_MS
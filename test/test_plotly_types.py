@@ -0,0 +1,47 @@
+from plotly_gtk.utils import plotly_types
+
+
+def test_schema_index(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    plotly_types._index.cache_clear()
+
+    keys = plotly_types.get_keys("data", "scatter")
+    assert "x" in keys
+    assert list((tmp_path / "plotly_gtk").glob("plot-schema-*.idx"))
+
+    plotly_types._index.cache_clear()
+    index = plotly_types._index()
+    assert index.sections == {}
+    assert plotly_types.get_keys("data", "scatter") == keys
+    assert list(index.sections) == ["traces/scatter"]
+    plotly_types._index.cache_clear()
+
+
+def test_schema_index_write_failure(tmp_path, monkeypatch):
+    def fail(src, dst):
+        raise OSError
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(plotly_types.os, "replace", fail)
+    plotly_types._index.cache_clear()
+
+    assert "x" in plotly_types.get_keys("data", "scatter")
+    assert list((tmp_path / "plotly_gtk").iterdir()) == []
+    plotly_types._index.cache_clear()
+
+
+def test_schema_index_corrupted(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    plotly_types._index.cache_clear()
+    keys = plotly_types.get_keys("data", "scatter")
+
+    plotly_types._index.cache_clear()
+    index = plotly_types._index()
+    with open(index.path, "r+b") as f:
+        f.truncate(index.data_start + 10)
+    assert plotly_types.get_keys("data", "scatter") == keys
+
+    plotly_types._index.cache_clear()
+    assert plotly_types._index().sections == {}
+    assert plotly_types.get_keys("data", "scatter") == keys
+    plotly_types._index.cache_clear()
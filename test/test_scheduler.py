@@ -0,0 +1,79 @@
+from plotly_gtk.utils.scheduler import FrameScheduler
+
+
+class _FrameClock:
+    def __init__(self):
+        self.time = 0
+
+    def get_frame_time(self):
+        return self.time
+
+
+class _Widget:
+    def __init__(self):
+        self.mapped = False
+        self.handlers = {}
+        self.tick_callbacks = {}
+        self.clock = _FrameClock()
+
+    def connect(self, signal, handler):
+        self.handlers[signal] = handler
+
+    def emit(self, signal):
+        self.mapped = signal == "map"
+        self.handlers[signal](self)
+
+    def get_mapped(self):
+        return self.mapped
+
+    def add_tick_callback(self, callback):
+        tick_id = len(self.tick_callbacks) + 1
+        self.tick_callbacks[tick_id] = callback
+        return tick_id
+
+    def remove_tick_callback(self, tick_id):
+        del self.tick_callbacks[tick_id]
+
+    def frame(self, interval=16667):
+        self.clock.time += interval
+        for tick_id, callback in list(self.tick_callbacks.items()):
+            if not callback(self, self.clock):
+                del self.tick_callbacks[tick_id]
+
+
+def test_frame_scheduler():
+    widget = _Widget()
+    calls = []
+    scheduler = FrameScheduler(widget, lambda: calls.append(widget.clock.time))
+
+    scheduler.schedule()
+    widget.frame()
+    assert calls == []
+
+    widget.emit("map")
+    for _ in range(10):
+        scheduler.schedule()
+    widget.frame()
+    widget.frame()
+    assert len(calls) == 1
+
+    scheduler.schedule()
+    widget.emit("unmap")
+    widget.frame()
+    assert len(calls) == 1
+    scheduler.flush()
+    assert len(calls) == 2 and not scheduler.pending
+
+
+def test_frame_scheduler_max_fps():
+    widget = _Widget()
+    calls = []
+    scheduler = FrameScheduler(
+        widget, lambda: calls.append(widget.clock.time), max_fps=10
+    )
+    widget.emit("map")
+    for _ in range(60):
+        scheduler.schedule()
+        widget.frame()
+    assert len(calls) == 10
+    assert min(b - a for a, b in zip(calls, calls[1:])) >= 1e5
@@ -0,0 +1,48 @@
+import threading
+
+import cairo
+from gi.repository import Pango
+
+from plotly_gtk.utils.text import invalidate, text_layout, text_size, update_context
+
+
+def test_text_layout():
+    font = Pango.FontDescription.from_string("Sans 12")
+    layout, size = text_layout(font, "<sup>2</sup>", markup=True)
+    assert text_layout(font, "<sup>2</sup>", markup=True)[0] is layout
+    assert text_size(font, "<sup>2</sup>", markup=True) == size
+    assert text_size(font, "2000", markup=True)[0] > size[0]
+    assert text_size(Pango.FontDescription.from_string("Sans 24"), "2000") > size
+    assert text_size(font, "a & <b>")[0] > text_size(font, "a")[0]
+
+    invalidate()
+    assert text_layout(font, "<sup>2</sup>", markup=True)[0] is not layout
+
+
+def test_text_layout_shared():
+    font = Pango.FontDescription.from_string("Sans 12")
+    layout = text_layout(font, "2000")[0]
+    layouts = []
+    thread = threading.Thread(target=lambda: layouts.append(text_layout(font, "2000")))
+    thread.start()
+    thread.join()
+    assert layouts[0][0] is layout
+
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)
+    surface.set_device_scale(2, 2)
+    update_context(cairo.Context(surface))
+    assert text_layout(font, "2000")[0] is not layout
+
+
+def test_text_layout_scale():
+    font = Pango.FontDescription.from_string("Sans 12")
+    update_context(cairo.Context(cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)))
+    layout, size = text_layout(font, "2000")
+
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 2, 2)
+    surface.set_device_scale(2, 2)
+    update_context(cairo.Context(surface))
+    scaled_layout, scaled_size = text_layout(font, "2000")
+    assert scaled_layout.get_pixel_size()[0] > 1.5 * layout.get_pixel_size()[0]
+    assert scaled_layout.get_pixel_size() != layout.get_pixel_size()
+    assert abs(scaled_size[0] - size[0]) <= 1
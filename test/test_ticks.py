@@ -0,0 +1,43 @@
+import numpy as np
+
+from plotly_gtk.utils.ticks import Ticks
+
+
+def test_log_ticks():
+    np.testing.assert_allclose(np.power(10, Ticks.log_ticks(0, 2)), [2, 5, 10, 20, 50])
+    np.testing.assert_allclose(np.power(10, Ticks.log_ticks(-1.5, -1)), [0.05])
+
+
+def test_cached_ticks():
+    layout = {
+        axis: {"_type": "linear", "_range": [0, 1], "nticks": 0}
+        for axis in ["xaxis", "xaxis2"]
+    }
+    tickvals = Ticks(layout, "xaxis", 500).calculate()
+    assert Ticks(layout, "xaxis2", 500).calculate() is tickvals
+    assert layout["xaxis2"]["_ticktext"] == layout["xaxis"]["_ticktext"]
+
+    layout["xaxis2"]["_range"] = [0, 2]
+    assert Ticks(layout, "xaxis2", 500).calculate()[-1] > tickvals[-1]
+
+    layout["xaxis"]["_type"] = "log"
+    layout["xaxis"]["_range"] = [0, 2]
+    np.testing.assert_allclose(
+        Ticks(layout, "xaxis", 500).calculate(), [2, 5, 10, 20, 50]
+    )
+    assert layout["xaxis"]["_ticktext"][:3] == ["<sup>2</sup>", "<sup>5</sup>", "10"]
+
+
+def test_array_ticks():
+    layout = {
+        "xaxis": {
+            "_type": "linear",
+            "_range": [-0.5, 1.5],
+            "nticks": 0,
+            "tickmode": "array",
+            "tickvals": np.arange(2),
+            "ticktext": ["a & b", "<c>"],
+        }
+    }
+    Ticks(layout, "xaxis", 500).calculate()
+    assert layout["xaxis"]["_ticktext"] == ["a &amp; b", "&lt;c&gt;"]
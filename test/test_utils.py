@@ -0,0 +1,20 @@
+import gc
+
+import numpy as np
+
+from plotly_gtk.utils import freeze
+
+
+def test_freeze():
+    updatemenu = {"buttons": [{"args": [{"y": [np.arange(3.0)]}], "label": "a"}]}
+    signature = freeze(updatemenu)
+    assert freeze(updatemenu) == signature
+    assert freeze({**updatemenu, "_private": 1}) == signature
+    assert freeze({**updatemenu, "_private": 1}, ["_private"]) != signature
+
+    # An array which replaced another does not match it, even if it is given the
+    # identity of the freed array
+    updatemenu["buttons"][0]["args"][0]["y"] = [np.arange(4.0)]
+    gc.collect()
+    assert freeze(updatemenu) != signature
+    assert freeze({"buttons": [{"args": [{"y": [np.arange(3.0)]}]}]}) != signature